@@ -0,0 +1,118 @@
+"""
+Benchmark: response encoding time and bytes on the wire.
+
+Builds extraction results of increasing size (many skills, IDs, emails and
+file numbers, as produced by long documents) and, for every format and
+content coding negotiation.py can produce, measures:
+
+- encode ms:   serialization (and compression) time, median of --repeat runs
+- bytes:       size of the response body
+- vs baseline: size relative to uncompressed stdlib JSON (what JSONResponse sends)
+
+Formats or codings whose optional package (orjson, msgpack, zstandard) is
+not installed are reported as unavailable.
+
+Usage:
+    python benchmarks/bench_serialization.py [--values 100,1000,10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import negotiation  # noqa: E402
+from negotiation import compress_body  # noqa: E402
+
+
+def build_result(values: int, rng: random.Random) -> dict:
+    """An extraction result with about `values` entries in total."""
+    share = max(1, values // 6)
+    return {
+        "name": [f"Person {rng.randint(1, 10 ** 6)}" for _ in range(share // 10 + 1)],
+        "organization": [f"Company {rng.randint(1, 10 ** 6)} Ltd" for _ in range(share // 10 + 1)],
+        "location": ["Mumbai", "Berlin"],
+        "dates": [f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 29)}" for _ in range(share)],
+        "emails": [f"user{rng.randint(1, 10 ** 6)}@example.com" for _ in range(share)],
+        "phone_numbers": [f"+91 98{rng.randint(10 ** 7, 10 ** 8 - 1)}" for _ in range(share)],
+        "ids": [f"ID-{rng.randint(10 ** 5, 10 ** 6)}" for _ in range(share)],
+        "file_numbers": [f"FILE/{rng.randint(1000, 9999)}/{rng.randint(10, 99)}" for _ in range(share)],
+        "skills": [rng.choice(["Python", "Java", "SQL", "Docker", "Kubernetes", "React"]) + f" {i}"
+                   for i in range(share)],
+    }
+
+
+def stdlib_json(content) -> bytes:
+    """What JSONResponse does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _time(func, repeat: int):
+    samples = []
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), output
+
+
+def variants():
+    """(label, callable(content) -> bytes or None if unavailable)."""
+    def orjson_encode(content):
+        return negotiation.orjson.dumps(content) if negotiation.orjson else None
+
+    def msgpack_encode(content):
+        return negotiation.msgpack.packb(content, use_bin_type=True) if negotiation.msgpack else None
+
+    def with_coding(encode, coding):
+        def run(content):
+            body = encode(content)
+            if body is None or (coding == "zstd" and negotiation.zstandard is None):
+                return None
+            return compress_body(body, coding)
+        return run
+
+    fast_json = orjson_encode if negotiation.orjson else stdlib_json
+    return [
+        ("json (stdlib)", stdlib_json),
+        ("json (orjson)", orjson_encode),
+        ("msgpack", msgpack_encode),
+        ("json + gzip", with_coding(fast_json, "gzip")),
+        ("json + zstd", with_coding(fast_json, "zstd")),
+        ("msgpack + gzip", with_coding(msgpack_encode, "gzip")),
+        ("msgpack + zstd", with_coding(msgpack_encode, "zstd")),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--values", default="100,1000,10000", help="Total extracted values per result")
+    parser.add_argument("--repeat", type=int, default=20, help="Encodings per measurement")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"negotiated default for 'Accept: */*': {negotiation.choose_media_type('*/*')}; "
+          f"best coding for 'Accept-Encoding: gzip, zstd': {negotiation.choose_encoding('gzip, zstd')}")
+
+    for count in (int(value) for value in args.values.split(',')):
+        content = build_result(count, rng)
+        baseline = len(stdlib_json(content))
+        print(f"\n{count} values")
+        print(f"{'variant':<16} {'encode ms':>10} {'bytes':>10} {'vs baseline':>12}")
+        for label, encode in variants():
+            if encode(content) is None:
+                print(f"{label:<16} {'unavailable':>10}")
+                continue
+            seconds, body = _time(lambda: encode(content), args.repeat)
+            print(f"{label:<16} {seconds * 1000:>10.3f} {len(body):>10} {len(body) / baseline:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
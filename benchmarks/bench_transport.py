@@ -0,0 +1,120 @@
+"""
+Benchmark: IPC cost and memory of plain pickling versus shared-memory handles.
+
+Sends a document of each size to a worker process the way
+ProcessPoolExtractor does, and compares:
+
+- pickle: bytes passed as a task argument (copied into the worker's heap)
+- shm:    the document streamed into a shared memory segment with
+          put_stream(), and the worker opening the segment by path
+          (transport.segment_path) and scanning it through a read-only
+          mapping, without copying it into its heap
+
+For each variant it reports the median round trip and how much the
+worker's peak RSS grew while handling the largest documents. No NER model
+is loaded; the worker only scans the data, so the numbers isolate
+transport overhead.
+
+Usage:
+    python benchmarks/bench_transport.py [--sizes 1,16,64,256] [--repeat 5]
+"""
+
+import argparse
+import io
+import mmap
+import multiprocessing
+import os
+import pickle
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transport import SegmentRegistry, open_bytes, segment_path  # noqa: E402
+
+MARKER = b"%%EOF"
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker_pickle(data: bytes):
+    return data.rfind(MARKER), _peak_rss_mb()
+
+
+def _worker_shm(handle):
+    path = segment_path(handle)
+    if path is None:
+        return open_bytes(handle).rfind(MARKER), _peak_rss_mb()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped.rfind(MARKER), _peak_rss_mb()
+
+
+def _time(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _new_executor() -> ProcessPoolExecutor:
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    executor.submit(len, b"").result()  # start the worker outside the timings
+    return executor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,16,64,256", help="Document sizes in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="Round trips per measurement")
+    args = parser.parse_args()
+
+    registry = SegmentRegistry()
+    # One worker per variant, so each one's peak RSS reflects only its own transport
+    pickle_executor = _new_executor()
+    shm_executor = _new_executor()
+    pickle_base = pickle_executor.submit(_peak_rss_mb).result()
+    shm_base = shm_executor.submit(_peak_rss_mb).result()
+
+    print(f"{'size':>8} {'pickle ms':>10} {'shm ms':>10} {'speedup':>8} {'pickled task bytes':>19} {'shm task bytes':>15}")
+    try:
+        for size_mb in (int(size) for size in args.sizes.split(',')):
+            data = os.urandom(size_mb * 1024 * 1024 - len(MARKER)) + MARKER
+
+            def via_pickle():
+                pickle_executor.submit(_worker_pickle, data).result()
+
+            def via_shm():
+                handle = registry.put_stream(io.BytesIO(data), len(data))
+                try:
+                    shm_executor.submit(_worker_shm, handle).result()
+                finally:
+                    registry.release(handle)
+
+            pickle_ms = _time(via_pickle, args.repeat) * 1000
+            shm_ms = _time(via_shm, args.repeat) * 1000
+            pickled_bytes = len(pickle.dumps((_worker_pickle, (data,))))
+            sample_handle = registry.put_bytes(data[:1])
+            handle_bytes = len(pickle.dumps((_worker_shm, (sample_handle,))))
+            registry.release(sample_handle)
+            print(f"{size_mb:>6}MB {pickle_ms:>10.1f} {shm_ms:>10.1f} {pickle_ms / shm_ms:>7.2f}x "
+                  f"{pickled_bytes:>19} {handle_bytes:>15}")
+
+        pickle_peak = pickle_executor.submit(_peak_rss_mb).result()
+        shm_peak = shm_executor.submit(_peak_rss_mb).result()
+        print(f"\nworker peak RSS growth: pickle {pickle_peak - pickle_base:.0f} MB, "
+              f"shm {shm_peak - shm_base:.0f} MB")
+    finally:
+        pickle_executor.shutdown()
+        shm_executor.shutdown()
+        registry.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Load test: /extract latency and throughput at stepped concurrency levels.
+
+Replays a mix of PDF and TXT documents against the API and reports, per
+concurrency step, throughput, p50/p95/p99 latency, error rate and peak RSS
+of the server process. The result is a saturation curve: throughput stops
+growing (and tail latency climbs) once the server is saturated.
+
+Peak RSS is per step: the kernel's high-water mark is reset before each
+step (/proc/<pid>/clear_refs, Linux). Where that is not possible the value
+is the peak since the server started and is marked with '*'.
+
+The server under test never touches persistent state: the entity index is
+disabled and no folders are watched, so synthetic documents do not end up
+in the real index (and in /search or /export).
+
+Targets:
+- in-process (default): the FastAPI app from main.py, driven over ASGI
+- --server:  a uvicorn subprocess started on a free local port
+- --url:     an already running server
+
+With --ner stub (the default) the deterministic StubNERPipeline replaces
+the Hugging Face model, so the harness needs no model download and no
+network. Every request carries a unique nonce so the result cache is not
+hit, unless --allow-cache-hits is given.
+
+Usage:
+    python benchmarks/loadtest.py [--concurrency 1,2,4,8,16] [--requests-per-step 64]
+                                  [--pdf-ratio 0.5] [--server | --url URL] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("The load test needs httpx: pip install httpx")
+
+
+PDF_DIR = ROOT / "Test PDF for Document Intelligence System"
+
+SYNTHETIC_NAMES = ["Alice Johnson", "Rahul Sharma", "Maria Garcia", "Wei Chen", "John Smith"]
+SYNTHETIC_COMPANIES = ["Acme Technologies", "Globex Corp", "Initech Ltd", "Umbrella LLC"]
+SYNTHETIC_CITIES = ["Mumbai", "Berlin", "Austin", "Singapore"]
+
+
+def synthetic_txt(rng: random.Random, paragraphs: int) -> bytes:
+    """Build a TXT document that exercises every extractor."""
+    lines = []
+    for index in range(paragraphs):
+        name = rng.choice(SYNTHETIC_NAMES)
+        company = rng.choice(SYNTHETIC_COMPANIES)
+        lines.append(
+            f"Invoice No: INV-{rng.randint(1000, 9999)} dated {rng.randint(1, 28):02d}/"
+            f"{rng.randint(1, 12):02d}/2024 issued by {company} in {rng.choice(SYNTHETIC_CITIES)}.\n"
+            f"Contact {name} at {name.split()[0].lower()}{index}@example.com or "
+            f"+91 98{rng.randint(10000000, 99999999)}. Total amount: ${rng.randint(100, 99999)}.{rng.randint(0, 99):02d}\n"
+            f"Website: https://www.{company.split()[0].lower()}.com  PAN: ABCDE{rng.randint(1000, 9999)}F\n"
+        )
+    return "\n".join(lines).encode("utf-8")
+
+
+def load_documents(rng: random.Random, pdf_dir: Path, txt_paragraphs: int) -> Dict[str, List[Tuple[str, bytes]]]:
+    """
+    Collect the documents to replay.
+
+    Returns:
+        Dictionary mapping 'pdf' and 'txt' to lists of (filename, content)
+    """
+    pdfs = [(path.name, path.read_bytes()) for path in sorted(pdf_dir.glob("*.pdf"))] if pdf_dir.is_dir() else []
+    txts = [(f"synthetic_{index}.txt", synthetic_txt(rng, txt_paragraphs)) for index in range(8)]
+    return {"pdf": pdfs, "txt": txts}
+
+
+def with_nonce(filename: str, content: bytes, nonce: str) -> bytes:
+    """
+    Make a document unique without changing what is extracted from it.
+
+    PDFs get a comment after the final %%EOF, which readers ignore; TXT
+    files get a trailing blank line with a token that no extractor matches.
+    """
+    if filename.endswith(".pdf"):
+        return content + f"\n%{nonce}\n".encode()
+    return content + f"\n\nref {nonce}\n".encode()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+# Settings that keep the server under test away from persistent state
+HARNESS_ENVIRONMENT = {
+    "ENTITY_INDEX_PATH": "",
+    "WATCH_DIRS": "",
+}
+
+
+def harness_environment(base: Dict[str, str], ner: str) -> Dict[str, str]:
+    """Environment for the server under test."""
+    env = dict(base)
+    env.update(HARNESS_ENVIRONMENT)
+    if ner == "stub":
+        env["NER_MODEL"] = "stub"
+    return env
+
+
+def reset_peak_rss(pid: int) -> bool:
+    """
+    Reset a process's peak RSS (VmHWM) so the next reading covers one step.
+
+    Returns:
+        True if the high-water mark was reset (Linux 4.0+, own processes)
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """
+    Peak resident set size of a process, in MB.
+
+    Read from /proc (Linux); for this process getrusage() is the fallback,
+    which never resets.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+async def run_step(client: "httpx.AsyncClient", concurrency: int, total: int, rng: random.Random,
+                   documents: Dict[str, List[Tuple[str, bytes]]], pdf_ratio: float,
+                   unique: bool, query: str) -> Dict:
+    """
+    Send total requests with at most concurrency in flight.
+
+    Returns:
+        Dictionary with throughput, latency percentiles and error counts
+    """
+    plan = []
+    for index in range(total):
+        kind = "pdf" if documents["pdf"] and rng.random() < pdf_ratio else "txt"
+        filename, content = rng.choice(documents[kind])
+        if unique:
+            content = with_nonce(filename, content, f"{concurrency}-{index}-{rng.getrandbits(32):08x}")
+        plan.append((filename, content))
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def worker():
+        while True:
+            try:
+                filename, content = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/extract{query}", files={"file": (filename, content)})
+                outcome = None if response.status_code == 200 else str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if outcome is None:
+                latencies.append(elapsed)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "errors": errors,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: Dict[str, str], timeout: float = 120.0) -> subprocess.Popen:
+    """Start uvicorn on main:app and wait until /health answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=str(ROOT), env=env
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit("uvicorn did not become healthy in time")
+
+
+async def run_load(args, client: "httpx.AsyncClient", server_pid: Optional[int]) -> List[Dict]:
+    rng = random.Random(args.seed)
+    documents = load_documents(rng, Path(args.pdf_dir), args.txt_paragraphs)
+    if not documents["pdf"] and args.pdf_ratio > 0:
+        print(f"Warning: no PDFs found in {args.pdf_dir}, sending TXT only", file=sys.stderr)
+
+    query = f"?fields={args.fields}" if args.fields else ""
+    unique = not args.allow_cache_hits
+
+    # One warm-up request so model loading and first-call costs stay out of step one
+    filename, content = documents["txt"][0]
+    await client.post(f"/extract{query}", files={"file": (filename, with_nonce(filename, content, "warmup"))})
+
+    steps = []
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        per_step = server_pid is not None and reset_peak_rss(server_pid)
+        step = await run_step(client, concurrency, args.requests_per_step, rng, documents,
+                              args.pdf_ratio, unique, query)
+        rss = peak_rss_mb(server_pid) if server_pid is not None else None
+        step["peak_rss_mb"] = round(rss, 1) if rss is not None else None
+        step["peak_rss_per_step"] = per_step
+        steps.append(step)
+        if not args.json:
+            print_step(step)
+    return steps
+
+
+def print_header() -> None:
+    print(f"{'conc':>5} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7} {'peak RSS MB':>12}")
+
+
+def print_step(step: Dict) -> None:
+    rss = "n/a"
+    if step["peak_rss_mb"] is not None:
+        rss = f"{step['peak_rss_mb']:.1f}" + ("" if step["peak_rss_per_step"] else "*")
+    print(f"{step['concurrency']:>5} {step['requests']:>6} {step['throughput_rps']:>8.2f} "
+          f"{step['p50_ms']:>9.1f} {step['p95_ms']:>9.1f} {step['p99_ms']:>9.1f} "
+          f"{step['error_rate']:>6.1%} {rss:>12}")
+
+
+async def main_async(args) -> List[Dict]:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            return await run_load(args, client, None)
+
+    if args.server:
+        port = free_port()
+        server = start_server(port, harness_environment(os.environ, args.ner))
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout,
+                                         limits=limits) as client:
+                return await run_load(args, client, server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    # In-process: main reads its configuration at import time
+    os.environ.update(harness_environment({}, args.ner))
+    import main as api
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            return await run_load(args, client, os.getpid())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--server", action="store_true", help="Start a local uvicorn server and load it over HTTP")
+    target.add_argument("--url", help="Base URL of an already running server")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma separated concurrency steps")
+    parser.add_argument("--requests-per-step", type=int, default=64, help="Requests sent at each step")
+    parser.add_argument("--pdf-ratio", type=float, default=0.5, help="Fraction of requests that send a PDF")
+    parser.add_argument("--pdf-dir", default=str(PDF_DIR), help="Directory of PDFs to replay")
+    parser.add_argument("--txt-paragraphs", type=int, default=20, help="Size of the synthetic TXT documents")
+    parser.add_argument("--fields", help="Comma separated fields to request (default: all)")
+    parser.add_argument("--ner", choices=["stub", "model"], default="stub",
+                        help="Use the deterministic stub NER or the configured model (not applied with --url)")
+    parser.add_argument("--allow-cache-hits", action="store_true", help="Do not make each request unique")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the document mix")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    if not args.json:
+        print_header()
+    steps = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps({"steps": steps}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Document View Module
+
+This module handles:
+- A per-document view of the extracted text shared by every extractor
+- Lazily cached derived representations (casefolded text, line and page
+  offsets, character-class presence flags)
+- Regex matching that keeps match offsets, so results can report the
+  page and line each value came from
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+DIGIT_PATTERN = re.compile(r'\d')
+LINE_BREAK_PATTERN = re.compile(r'\n')
+
+
+class DocumentView:
+    """
+    Read-only view of a document's text, built once per document.
+
+    Derived representations are computed on first use and then reused by
+    every extractor, instead of each extract_* method re-deriving them.
+    Extractors also record the offset of each value they keep, which lets
+    the result carry page and line positions at no extra scanning cost.
+    """
+
+    def __init__(self, text: str, page_starts: Optional[List[int]] = None,
+                 page_numbers: Optional[List[int]] = None):
+        """
+        Initialize the view.
+
+        Args:
+            text: Full document text
+            page_starts: Offset in text at which each page begins (PDFs only);
+                a single page starting at 0 is assumed otherwise
+            page_numbers: 1-based document page number of each entry in
+                page_starts, when only some pages were extracted
+        """
+        self.text = text
+        self.page_starts = array('q', page_starts or [0])
+        self.page_numbers = page_numbers
+        # field -> [(value, offset)] for values kept by the extractors
+        self.positions: Dict[str, List[Tuple[str, int]]] = {}
+
+    @classmethod
+    def of(cls, text: Union[str, "DocumentView"]) -> "DocumentView":
+        """
+        Return a view of the given text, reusing it if it already is a view.
+
+        Args:
+            text: Document text or an existing DocumentView
+
+        Returns:
+            DocumentView of the text
+        """
+        if isinstance(text, DocumentView):
+            return text
+        return cls(text)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @cached_property
+    def casefolded(self) -> str:
+        """
+        Casefolded text for case-insensitive presence checks.
+
+        Casefolding can change the length of some characters, so offsets into
+        this string do not necessarily line up with offsets into text.
+        """
+        return self.text.casefold()
+
+    @cached_property
+    def line_starts(self) -> array:
+        """Offset at which each line of the text begins."""
+        starts = array('q', [0])
+        starts.extend(match.end() for match in LINE_BREAK_PATTERN.finditer(self.text))
+        return starts
+
+    @cached_property
+    def has_digit(self) -> bool:
+        """Whether the text contains any digit."""
+        return DIGIT_PATTERN.search(self.text) is not None
+
+    @cached_property
+    def has_at_sign(self) -> bool:
+        """Whether the text contains an '@' (required by every email)."""
+        return '@' in self.text
+
+    def contains(self, keyword: str) -> bool:
+        """
+        Case-insensitive substring check against the casefolded text.
+
+        Used to skip regex scans whose literal keyword cannot occur.
+
+        Args:
+            keyword: Lowercase keyword
+
+        Returns:
+            True if the keyword occurs in the text, ignoring case
+        """
+        return keyword.casefold() in self.casefolded
+
+    def has_digit_between(self, start: int, end: int) -> bool:
+        """
+        Whether any digit occurs in text[start:end].
+
+        Args:
+            start: Start offset (inclusive)
+            end: End offset (exclusive)
+
+        Returns:
+            True if the span contains a digit
+        """
+        return DIGIT_PATTERN.search(self.text, start, end) is not None
+
+    def find_all(self, pattern: str, flags: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """
+        Iterate over regex matches together with their offsets.
+
+        Mirrors re.findall(): when the pattern has one capturing group the
+        group's text is produced, otherwise the whole match.
+
+        Args:
+            pattern: Regular expression
+            flags: re flags
+
+        Yields:
+            Tuples of (matched text, start offset, end offset)
+        """
+        compiled = re.compile(pattern, flags)
+        group = 1 if compiled.groups == 1 else 0
+        for match in compiled.finditer(self.text):
+            value = match.group(group)
+            if value is None:
+                yield '', match.start(), match.start()
+            else:
+                yield value, match.start(group), match.end(group)
+
+    def record(self, field: str, value: str, offset: int) -> None:
+        """
+        Remember where a kept value was found.
+
+        Args:
+            field: Output field name
+            value: Value as it appears in the result
+            offset: Offset of the match in text
+        """
+        self.positions.setdefault(field, []).append((value, offset))
+
+    def page_of(self, offset: int) -> int:
+        """1-based page number containing an offset."""
+        index = bisect_right(self.page_starts, offset)
+        if self.page_numbers is not None and index:
+            return self.page_numbers[index - 1]
+        return index
+
+    def line_of(self, offset: int) -> int:
+        """1-based line number containing an offset."""
+        return bisect_right(self.line_starts, offset)
+
+    def locate(self, offset: int) -> Dict:
+        """
+        Describe where an offset lies in the document.
+
+        Args:
+            offset: Offset in text
+
+        Returns:
+            Dictionary with the offset, page and line
+        """
+        return {"offset": offset, "page": self.page_of(offset), "line": self.line_of(offset)}
+
+    def positions_for(self, fields: Tuple[str, ...]) -> Dict[str, List[Dict]]:
+        """
+        Positions of the recorded values of the given fields.
+
+        Args:
+            fields: Output field names
+
+        Returns:
+            Dictionary mapping each field to a list of {value, offset, page, line}
+        """
+        return {
+            field: [dict(value=value, **self.locate(offset)) for value, offset in self.positions.get(field, [])]
+            for field in fields
+        }
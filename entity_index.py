@@ -0,0 +1,547 @@
+"""
+Entity Index Module
+
+This module handles:
+- A persistent inverted index of extracted entities, stored in SQLite FTS5
+- Batched, asynchronous index writes (extraction never waits on the index)
+- Entity, prefix and field-filtered search across every processed document
+- Index compaction (FTS5 segment merge, WAL checkpoint, optional VACUUM)
+- Paged reads of every indexed document, for bulk export
+
+Every extraction result is indexed under its document's SHA-256, so a
+question such as "which files mention Acme Corp?" is answered from the
+index instead of running the pipeline again.
+
+Schema:
+    documents       (doc_id, document_hash, file_type, filename, version, indexed_at)
+    entity_values   (id, doc_id, field, value), indexed by (doc_id, field)
+    entities        FTS5 over entity_values.value (external content, kept in
+                    sync by triggers)
+
+Replacing a document's entities is a b-tree lookup on entity_values rather
+than a scan of the full-text table. Values are tokenized with unicode61
+(case and diacritic insensitive) and 2- and 3-character prefix indexes are
+kept so prefix queries stay fast.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from extractor import RESULT_FIELDS
+
+
+SEARCH_MODES = ("match", "prefix", "exact")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    document_hash TEXT NOT NULL UNIQUE,
+    file_type TEXT NOT NULL,
+    filename TEXT,
+    version TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entity_values (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entity_values_doc ON entity_values (doc_id, field);
+CREATE VIRTUAL TABLE IF NOT EXISTS entities USING fts5(
+    value,
+    content = 'entity_values',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TRIGGER IF NOT EXISTS entity_values_insert AFTER INSERT ON entity_values BEGIN
+    INSERT INTO entities (rowid, value) VALUES (new.id, new.value);
+END;
+CREATE TRIGGER IF NOT EXISTS entity_values_delete AFTER DELETE ON entity_values BEGIN
+    INSERT INTO entities (entities, rowid, value) VALUES ('delete', old.id, old.value);
+END;
+"""
+
+
+def build_match_query(query: str, mode: str) -> str:
+    """
+    Turn user input into an FTS5 MATCH expression.
+
+    The input is always quoted as a single phrase, so FTS5 operators typed
+    by the user (AND, OR, NEAR, column filters, ...) are treated as text.
+
+    Args:
+        query: Search text
+        mode: 'match' or 'exact' (phrase) or 'prefix' (phrase whose last token is a prefix)
+
+    Returns:
+        FTS5 query string
+
+    Raises:
+        ValueError: If the query or mode is invalid
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}. Valid modes: {', '.join(SEARCH_MODES)}")
+    query = query.strip()
+    if not query:
+        raise ValueError("Search query must not be empty")
+    phrase = '"' + query.replace('"', '""') + '"'
+    return phrase + " *" if mode == "prefix" else phrase
+
+
+class EntityIndex:
+    """
+    SQLite FTS5 index of extracted entities, keyed by document hash.
+
+    Writes are queued and applied by a single writer thread in batches of up
+    to batch_size documents per transaction. Searches use a separate read
+    connection per thread; the database runs in WAL mode so reads never wait
+    for the writer.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file
+            batch_size: Maximum number of documents written per transaction
+            flush_interval: Seconds the writer waits to fill a batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._local = threading.local()
+        self._writer: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self.indexed = 0
+        self.batches = 0
+        self.write_errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("casefold", 1, lambda value: value.casefold() if value else value,
+                             deterministic=True)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._writer is not None:
+            return
+        self._writer = threading.Thread(target=self._run_writer, name="entity-index-writer", daemon=True)
+        self._writer.start()
+
+    def stop(self) -> None:
+        """Write everything still queued and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def close(self) -> None:
+        """Stop the writer and close the write connection."""
+        self.stop()
+        self._write_conn.close()
+
+    def add(self, document_hash: str, file_type: str, result: Dict,
+            filename: Optional[str] = None, version: Optional[str] = None) -> None:
+        """
+        Queue an extraction result for indexing, replacing the document's entities.
+
+        Only results covering every field are indexed, so a field without
+        entities always means the extractor found none, and a document's
+        version says which extractor produced all of its entities.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document
+            file_type: File extension (e.g., 'pdf', 'txt')
+            result: Full extraction result (extra keys such as positions are ignored)
+            filename: Original file name, if known
+            version: Extractor version that produced the result
+
+        Raises:
+            ValueError: If result is a partial (field-filtered) result
+        """
+        missing = [field for field in RESULT_FIELDS if field not in result]
+        if missing:
+            raise ValueError(f"Only full results can be indexed; missing fields: {', '.join(missing)}")
+        entry = (document_hash, file_type, filename, version,
+                 {field: list(result[field]) for field in RESULT_FIELDS})
+        if self._writer is None:
+            self.add_many([entry])
+        else:
+            self._queue.put(entry)
+
+    def add_many(self, entries: Iterable[Tuple[str, str, Optional[str], Optional[str], Dict]]) -> int:
+        """
+        Index many documents synchronously, in a single transaction per batch.
+
+        Args:
+            entries: Tuples of (document_hash, file_type, filename, version, {field: [values]})
+
+        Returns:
+            Number of documents written
+        """
+        written = 0
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def _run_writer(self) -> None:
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep consuming the queue, or flush() and compact() would wait forever
+                self.write_errors += 1
+                print(f"Warning: failed to write {len(batch)} document(s) to the entity index: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, str, Optional[str], Optional[str], Dict]]) -> int:
+        now = time.time()
+        with self._write_lock, self._write_conn as conn:
+            for document_hash, file_type, filename, version, fields in batch:
+                conn.execute(
+                    "INSERT INTO documents (document_hash, file_type, filename, version, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(document_hash) DO UPDATE SET file_type = excluded.file_type, "
+                    "filename = COALESCE(excluded.filename, documents.filename), "
+                    "version = excluded.version, indexed_at = excluded.indexed_at",
+                    (document_hash, file_type, filename, version, now)
+                )
+                doc_id = conn.execute(
+                    "SELECT doc_id FROM documents WHERE document_hash = ?", (document_hash,)
+                ).fetchone()[0]
+                conn.execute("DELETE FROM entity_values WHERE doc_id = ?", (doc_id,))
+                conn.executemany(
+                    "INSERT INTO entity_values (doc_id, field, value) VALUES (?, ?, ?)",
+                    ((doc_id, field, str(value)) for field, values in fields.items() for value in values)
+                )
+        self.indexed += len(batch)
+        self.batches += 1
+        return len(batch)
+
+    def flush(self) -> None:
+        """Wait until every queued document has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def search(self, query: str, mode: str = "match", field: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Find documents mentioning an entity.
+
+        Args:
+            query: Entity text to look for
+            mode: 'match' (all tokens as a phrase, case-insensitive), 'prefix'
+                (phrase whose last token may be a prefix) or 'exact' (the
+                whole value, case-insensitive)
+            field: Only search this output field (e.g., 'organization', 'phone_numbers')
+            limit: Maximum number of documents returned
+            offset: Number of matching documents to skip
+
+        Returns:
+            Dictionary with the matching documents and the entities that matched
+
+        Raises:
+            ValueError: If the query, mode or field is invalid
+        """
+        if field is not None and field not in RESULT_FIELDS:
+            raise ValueError(f"Unknown field: {field}. Valid fields: {', '.join(RESULT_FIELDS)}")
+        if limit < 1 or offset < 0:
+            raise ValueError("limit must be positive and offset must not be negative")
+
+        match = build_match_query(query, mode)
+        conditions = ["entities MATCH ?"]
+        params: List = [match]
+        if field is not None:
+            conditions.append("v.field = ?")
+            params.append(field)
+        if mode == "exact":
+            conditions.append("casefold(v.value) = ?")
+            params.append(query.strip().casefold())
+        where = " AND ".join(conditions)
+        matches = "entities JOIN entity_values v ON v.id = entities.rowid"
+
+        conn = self._reader()
+        try:
+            # One row per document; fetch one extra to know whether there are more
+            doc_ids = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT v.doc_id FROM {matches} WHERE {where} LIMIT ? OFFSET ?",
+                (*params, limit + 1, offset)
+            )]
+            has_more = len(doc_ids) > limit
+            doc_ids = doc_ids[:limit]
+
+            documents: Dict[int, Dict] = {}
+            if doc_ids:
+                placeholders = ",".join("?" * len(doc_ids))
+                for doc_id, document_hash, file_type, filename, version, indexed_at in conn.execute(
+                    f"SELECT doc_id, document_hash, file_type, filename, version, indexed_at "
+                    f"FROM documents WHERE doc_id IN ({placeholders})", doc_ids
+                ):
+                    documents[doc_id] = {
+                        "document_hash": document_hash,
+                        "file_type": file_type,
+                        "filename": filename,
+                        "extractor_version": version,
+                        "indexed_at": indexed_at,
+                        "matches": [],
+                    }
+                for doc_id, match_field, value in conn.execute(
+                    f"SELECT v.doc_id, v.field, v.value FROM {matches} "
+                    f"WHERE {where} AND v.doc_id IN ({placeholders})",
+                    (*params, *doc_ids)
+                ):
+                    documents[doc_id]["matches"].append({"field": match_field, "value": value})
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {str(e)}")
+
+        return {
+            "query": query,
+            "mode": mode,
+            "field": field,
+            "offset": offset,
+            "count": len(doc_ids),
+            "has_more": has_more,
+            "documents": [documents[doc_id] for doc_id in doc_ids if doc_id in documents],
+        }
+
+    def iter_documents(self, batch_size: int = 1000, file_type: Optional[str] = None,
+                       since: Optional[float] = None) -> Iterator[List[Dict]]:
+        """
+        Read every indexed document with its entities, a batch at a time.
+
+        Documents are paged by doc_id, each page in its own short read
+        transaction on a dedicated connection, so memory use is bounded by
+        batch_size and a long export never holds back WAL checkpoints.
+        Documents indexed while the export runs are included if they sort
+        after the current page.
+
+        Args:
+            batch_size: Documents per yielded batch
+            file_type: Only documents of this file type (e.g., 'pdf')
+            since: Only documents indexed at or after this Unix timestamp
+
+        Yields:
+            Lists of dictionaries with document_hash, file_type, filename,
+            extractor_version, indexed_at and fields ({field: [values]} in
+            extraction order)
+
+        Raises:
+            ValueError: If batch_size is not positive
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        conditions = ["doc_id > ?"]
+        filters: List = []
+        if file_type is not None:
+            conditions.append("file_type = ?")
+            filters.append(file_type)
+        if since is not None:
+            conditions.append("indexed_at >= ?")
+            filters.append(since)
+        where = " AND ".join(conditions)
+
+        conn = self._connect()
+        try:
+            last_doc_id = 0
+            while True:
+                rows = conn.execute(
+                    f"SELECT doc_id, document_hash, file_type, filename, version, indexed_at "
+                    f"FROM documents WHERE {where} ORDER BY doc_id LIMIT ?",
+                    (last_doc_id, *filters, batch_size)
+                ).fetchall()
+                if not rows:
+                    return
+                documents: Dict[int, Dict] = {}
+                for doc_id, document_hash, doc_file_type, filename, version, indexed_at in rows:
+                    documents[doc_id] = {
+                        "document_hash": document_hash,
+                        "file_type": doc_file_type,
+                        "filename": filename,
+                        "extractor_version": version,
+                        "indexed_at": indexed_at,
+                        "fields": {},
+                    }
+                last_doc_id = rows[-1][0]
+                placeholders = ",".join("?" * len(documents))
+                for doc_id, field, value in conn.execute(
+                    f"SELECT doc_id, field, value FROM entity_values "
+                    f"WHERE doc_id IN ({placeholders}) ORDER BY doc_id, id",
+                    tuple(documents)
+                ):
+                    documents[doc_id]["fields"].setdefault(field, []).append(value)
+                yield list(documents.values())
+                if len(rows) < batch_size:
+                    return
+        finally:
+            conn.close()
+
+    def contains(self, document_hash: str, file_type: str, version: str) -> bool:
+        """
+        Check whether a document was indexed from a result of this extractor version.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document
+            file_type: File extension the document was extracted as
+            version: Current extractor version
+
+        Returns:
+            True if the document's indexed entities come from this version
+        """
+        row = self._reader().execute(
+            "SELECT 1 FROM documents WHERE document_hash = ? AND file_type = ? AND version = ?",
+            (document_hash, file_type, version)
+        ).fetchone()
+        return row is not None
+
+    def get_result(self, document_hash: str, file_type: str, version: str) -> Optional[Dict]:
+        """
+        Rebuild a document's extraction result from the index.
+
+        The index only holds full results, so every field is present (empty
+        when the extractor found nothing) and values keep extraction order.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document
+            file_type: File extension the document was extracted as
+            version: Current extractor version; results of other versions are ignored
+
+        Returns:
+            Dictionary of {field: [values]} in result order, or None if the
+            document was not indexed from a result of this version
+        """
+        conn = self._reader()
+        row = conn.execute(
+            "SELECT doc_id FROM documents WHERE document_hash = ? AND file_type = ? AND version = ?",
+            (document_hash, file_type, version)
+        ).fetchone()
+        if row is None:
+            return None
+        result: Dict[str, List[str]] = {field: [] for field in RESULT_FIELDS}
+        for field, value in conn.execute(
+            "SELECT field, value FROM entity_values WHERE doc_id = ? ORDER BY id", row
+        ):
+            result.setdefault(field, []).append(value)
+        return result
+
+    def remove(self, document_hash: str) -> bool:
+        """
+        Remove a document and its entities from the index.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document
+
+        Returns:
+            True if the document was indexed
+        """
+        with self._write_lock, self._write_conn as conn:
+            row = conn.execute("SELECT doc_id FROM documents WHERE document_hash = ?", (document_hash,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM entity_values WHERE doc_id = ?", row)
+            conn.execute("DELETE FROM documents WHERE doc_id = ?", row)
+        return True
+
+    def compact(self, vacuum: bool = False) -> Dict:
+        """
+        Compact the index.
+
+        Merges all FTS5 segments into one (FTS5 'optimize'), checkpoints and
+        truncates the write-ahead log and, optionally, rebuilds the database
+        file to return free pages to the filesystem. Writes are paused while
+        this runs; searches are not.
+
+        Args:
+            vacuum: Also run VACUUM (slow on large indexes)
+
+        Returns:
+            Dictionary with the database size before and after, and the time taken
+        """
+        self.flush()
+        before = self._size_bytes()
+        started = time.perf_counter()
+        with self._write_lock:
+            with self._write_conn as conn:
+                conn.execute("INSERT INTO entities (entities) VALUES ('optimize')")
+            if vacuum:
+                self._write_conn.execute("VACUUM")
+            self._write_conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "size_bytes_before": before,
+            "size_bytes_after": self._size_bytes(),
+            "seconds": round(time.perf_counter() - started, 3),
+            "vacuumed": vacuum,
+        }
+
+    def _size_bytes(self) -> int:
+        total = 0
+        for suffix in ("", "-wal"):
+            try:
+                total += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return total
+
+    def stats(self) -> Dict:
+        """
+        Return index statistics.
+
+        Returns:
+            Dictionary with document counts, write counters and the on-disk size
+        """
+        documents = self._reader().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return {
+            "documents": documents,
+            "pending_writes": self._queue.qsize(),
+            "indexed": self.indexed,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "size_bytes": self._size_bytes(),
+        }
@@ -0,0 +1,405 @@
+"""
+Columnar Export Module
+
+This module handles:
+- Converting extraction results into Apache Arrow record batches, with every
+  list field stored as dictionary-encoded strings
+- Writing the batches as a Parquet file or an Arrow IPC stream, one batch at a time
+- Streaming an export of the entity index to disk or to an HTTP response
+- A command line entry point for scheduled (e.g. nightly) exports
+
+The entity index is read in pages of documents and each page becomes one
+record batch (one Parquet row group), so memory use depends on the batch
+size, not on how many documents are exported. Dictionaries are built per
+batch: values repeated across documents (skills, organizations, locations,
+job titles) are stored once per batch and referenced by index.
+
+Output columns:
+    document_hash, file_type, filename, extractor_version   string
+    indexed_at                                               timestamp (UTC)
+    one column per result field (name, organization, ...)   list<dictionary<int32, string>>
+
+The index only holds full results, so an empty list always means the
+extractor found no entities of that field in the document.
+
+pyarrow is optional; without it exports raise RuntimeError.
+
+Usage:
+    python export.py --output entities.parquet
+    python export.py --index /data/entity_index.db --since 2026-10-18 --output entities.parquet
+    python export.py --format arrow --fields organization,skills --output - > entities.arrows
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from entity_index import EntityIndex
+from extractor import DocumentExtractor
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+
+# Codecs each format supports, and the one used when none is requested
+COMPRESSIONS = {
+    "parquet": ("zstd", "snappy", "gzip", "lz4", "brotli", "none"),
+    "arrow": ("zstd", "lz4", "none"),
+}
+DEFAULT_COMPRESSION = {"parquet": "zstd", "arrow": "none"}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def require_pyarrow() -> None:
+    """
+    Fail if pyarrow is not installed.
+
+    Raises:
+        RuntimeError: If pyarrow cannot be imported
+    """
+    if pa is None:
+        raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow)")
+
+
+def export_schema(fields: Sequence[str]):
+    """
+    Arrow schema of an export.
+
+    Args:
+        fields: Result fields to include, in result order
+
+    Returns:
+        pyarrow.Schema
+    """
+    require_pyarrow()
+    entity_list = pa.list_(pa.dictionary(pa.int32(), pa.string()))
+    return pa.schema(
+        [
+            pa.field("document_hash", pa.string(), nullable=False),
+            pa.field("file_type", pa.string(), nullable=False),
+            pa.field("filename", pa.string()),
+            pa.field("extractor_version", pa.string()),
+            pa.field("indexed_at", pa.timestamp("ms", tz="UTC")),
+        ]
+        + [pa.field(field, entity_list, nullable=False) for field in fields]
+    )
+
+
+def _dictionary_list(rows: List[List[str]]):
+    """Build a list<dictionary<int32, string>> array; the dictionary holds each distinct value once."""
+    offsets = [0]
+    indices: List[int] = []
+    dictionary: Dict[str, int] = {}
+    for values in rows:
+        for value in values:
+            indices.append(dictionary.setdefault(value, len(dictionary)))
+        offsets.append(len(indices))
+    entries = pa.DictionaryArray.from_arrays(
+        pa.array(indices, type=pa.int32()),
+        pa.array(list(dictionary), type=pa.string())
+    )
+    return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), entries)
+
+
+def build_record_batch(documents: List[Dict], schema, fields: Sequence[str]):
+    """
+    Convert documents into one record batch.
+
+    Args:
+        documents: Dictionaries as yielded by EntityIndex.iter_documents()
+        schema: Schema from export_schema(fields)
+        fields: Result fields to include
+
+    Returns:
+        pyarrow.RecordBatch
+    """
+    indexed_at = [
+        int(document["indexed_at"] * 1000) if document.get("indexed_at") is not None else None
+        for document in documents
+    ]
+    columns = [
+        pa.array([document["document_hash"] for document in documents], type=pa.string()),
+        pa.array([document["file_type"] for document in documents], type=pa.string()),
+        pa.array([document.get("filename") for document in documents], type=pa.string()),
+        pa.array([document.get("extractor_version") for document in documents], type=pa.string()),
+        pa.array(indexed_at, type=pa.timestamp("ms", tz="UTC")),
+    ]
+    for field in fields:
+        columns.append(_dictionary_list([document["fields"].get(field, []) for document in documents]))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ColumnarWriter:
+    """
+    Writes extraction results to a Parquet file or Arrow IPC stream batch by batch.
+
+    Arrow output uses the IPC streaming format, which allows each batch to
+    carry its own dictionaries (the file format would need one dictionary
+    for the whole export).
+    """
+
+    def __init__(self, sink, format: str = "parquet", fields: Optional[List[str]] = None,
+                 compression: Optional[str] = None):
+        """
+        Open the writer; the format header is written to sink immediately.
+
+        Args:
+            sink: Path or writable binary file object
+            format: 'parquet' or 'arrow'
+            fields: Result fields to include, or None for all fields
+            compression: Codec (see COMPRESSIONS), or None for the format's default
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+            ValueError: If the format, a field or the codec is not supported
+        """
+        require_pyarrow()
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}. Supported formats: {', '.join(EXPORT_FORMATS)}")
+        self.format = format
+        self.fields = DocumentExtractor.resolve_fields(fields)
+        self.schema = export_schema(self.fields)
+        compression = (compression or DEFAULT_COMPRESSION[format]).lower()
+        if compression not in COMPRESSIONS[format]:
+            raise ValueError(
+                f"Unsupported {format} compression: {compression}. Supported: {', '.join(COMPRESSIONS[format])}"
+            )
+
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(sink, self.schema, compression=compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+            self._writer = pa.ipc.new_stream(sink, self.schema, options=options)
+        self.rows = 0
+        self.batches = 0
+        self.closed = False
+
+    def write(self, documents: List[Dict]) -> int:
+        """
+        Write documents as one record batch.
+
+        Args:
+            documents: Dictionaries as yielded by EntityIndex.iter_documents()
+
+        Returns:
+            Number of rows written
+        """
+        if not documents:
+            return 0
+        self._writer.write_batch(build_record_batch(documents, self.schema, self.fields))
+        self.rows += len(documents)
+        self.batches += 1
+        return len(documents)
+
+    def close(self) -> None:
+        """Write the footer (Parquet) or end-of-stream marker (Arrow)."""
+        if not self.closed:
+            self.closed = True
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _ChunkSink:
+    """Write-only file object that collects output until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(batches: Iterable[List[Dict]], format: str = "parquet",
+                  fields: Optional[List[str]] = None, compression: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Encode batches of documents as a stream of bytes (e.g. for an HTTP response).
+
+    The writer is created before this returns, so invalid arguments fail
+    before any output is produced. Each batch is encoded and handed out as
+    soon as it is written; nothing else is buffered.
+
+    Args:
+        batches: Lists of documents, e.g. EntityIndex.iter_documents()
+        format: 'parquet' or 'arrow'
+        fields: Result fields to include, or None for all fields
+        compression: Codec, or None for the format's default
+
+    Returns:
+        Iterator over chunks of the encoded export
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+        ValueError: If the format, a field or the codec is not supported
+    """
+    sink = _ChunkSink()
+    writer = ColumnarWriter(sink, format, fields, compression)
+
+    def generate() -> Iterator[bytes]:
+        try:
+            for documents in batches:
+                writer.write(documents)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            writer.close()
+            yield sink.drain()
+        finally:
+            # Release the index connection if the consumer stops early
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+
+    return generate()
+
+
+def export_index(index: EntityIndex, output, format: str = "parquet", fields: Optional[List[str]] = None,
+                 file_type: Optional[str] = None, since: Optional[float] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, compression: Optional[str] = None) -> Dict:
+    """
+    Export every indexed document to a file.
+
+    Args:
+        index: Entity index to read
+        output: Path or writable binary file object
+        format: 'parquet' or 'arrow'
+        fields: Result fields to include, or None for all fields
+        file_type: Only documents of this file type
+        since: Only documents indexed at or after this Unix timestamp
+        batch_size: Documents per record batch
+        compression: Codec, or None for the format's default
+
+    Returns:
+        Dictionary with the number of documents and batches written
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+        ValueError: If an argument is not supported
+    """
+    with ColumnarWriter(output, format, fields, compression) as writer:
+        for documents in index.iter_documents(batch_size, file_type, since):
+            writer.write(documents)
+    return {"documents": writer.rows, "batches": writer.batches, "format": format}
+
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a 'since' argument: a Unix timestamp or an ISO 8601 date/time (UTC if no offset).
+
+    Args:
+        value: Raw value, e.g. '1760832000' or '2026-10-18' or '2026-10-18T22:00:00+02:00'
+
+    Returns:
+        Unix timestamp, or None if value is empty
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}. Use Unix seconds or ISO 8601")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def format_for_path(path: str) -> str:
+    """Export format implied by a file name ('parquet' unless it ends in .arrow/.arrows)."""
+    return "arrow" if path.lower().endswith((".arrow", ".arrows")) else "parquet"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=os.environ.get("ENTITY_INDEX_PATH") or "entity_index.db",
+                        help="Entity index database (default: $ENTITY_INDEX_PATH or entity_index.db)")
+    parser.add_argument("--output", "-o", required=True, help="Output file, or '-' for stdout")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS),
+                        help="Output format (default: from the output file name, else parquet)")
+    parser.add_argument("--fields", help="Comma separated result fields (default: all)")
+    parser.add_argument("--file-type", help="Only export documents of this type (e.g. pdf)")
+    parser.add_argument("--since", help="Only documents indexed since this Unix timestamp or ISO date")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents per record batch")
+    parser.add_argument("--compression",
+                        help="parquet: zstd (default), snappy, gzip, lz4, brotli or none; arrow: none (default), zstd or lz4")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.error(f"entity index not found: {args.index}")
+    format = args.format or (format_for_path(args.output) if args.output != "-" else "parquet")
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+
+    index = EntityIndex(args.index)
+    try:
+        since = parse_since(args.since)
+        if args.output == "-":
+            summary = export_index(index, sys.stdout.buffer, format, fields, args.file_type, since,
+                                   args.batch_size, args.compression)
+        else:
+            # Write next to the target and rename, so readers never see a partial file
+            partial = args.output + ".part"
+            try:
+                summary = export_index(index, partial, format, fields, args.file_type, since,
+                                       args.batch_size, args.compression)
+                os.replace(partial, args.output)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+    except (RuntimeError, ValueError) as e:
+        print(f"Export failed: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        index.close()
+
+    print(f"Exported {summary['documents']} document(s) in {summary['batches']} batch(es) "
+          f"as {format} to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Extraction Budget Module
+
+This module handles:
+- Limiting which pages of a long PDF are extracted (page ranges, a page cap,
+  and a sampling mode: first/last N pages plus evenly spaced pages between)
+- A wall-clock budget for walking the pages
+- Coverage metadata telling the client which pages a result is based on
+
+A budget is created per request and consumed by the extractor, which records
+every page it actually read. Results produced under a budget that did not
+cover the whole document are partial: they are never cached or indexed as
+the document's result.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, Optional[int]]]:
+    """
+    Parse a page range specification such as '1-10,50,200-'.
+
+    Pages are 1-based and ranges inclusive; an open range ('200-') runs to
+    the last page.
+
+    Args:
+        spec: Comma separated pages and ranges
+
+    Returns:
+        List of (first, last) pairs; last is None for open ranges
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, dash, last = item.partition('-')
+        try:
+            start = int(first)
+            end = (int(last) if last.strip() else None) if dash else start
+        except ValueError:
+            raise ValueError(f"Invalid page range: {item}")
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"Invalid page range: {item}")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("Page range specification is empty")
+    return ranges
+
+
+def compress_pages(pages: List[int]) -> List[List[int]]:
+    """
+    Collapse sorted 1-based page numbers into [first, last] runs.
+
+    Args:
+        pages: Sorted page numbers
+
+    Returns:
+        List of [first, last] pairs
+    """
+    runs: List[List[int]] = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    return runs
+
+
+class ExtractionBudget:
+    """
+    Limits on how much of a document is extracted, and a record of what was.
+
+    Page selection is applied in this order: page ranges (default: every
+    page), then sampling, then the page cap (earliest selected pages kept).
+    The time budget is checked before each page is read.
+    """
+
+    def __init__(self, max_pages: Optional[int] = None,
+                 page_ranges: Optional[List[Tuple[int, Optional[int]]]] = None,
+                 time_budget: Optional[float] = None, sample_pages: Optional[int] = None):
+        """
+        Initialize the budget.
+
+        Args:
+            max_pages: Maximum number of pages to read
+            page_ranges: Pages to consider, as returned by parse_page_ranges()
+            time_budget: Seconds allowed for reading pages, from start()
+            sample_pages: Read the first and last N pages plus N evenly spaced pages between
+        """
+        self.max_pages = max_pages
+        self.page_ranges = page_ranges
+        self.time_budget = time_budget
+        self.sample_pages = sample_pages
+        self.deadline: Optional[float] = None
+        self.started: Optional[float] = None
+        self.page_count: Optional[int] = None
+        self.selected = 0
+        self.pages_read: List[int] = []
+        self.stopped_by: Optional[str] = None
+
+    @classmethod
+    def from_params(cls, max_pages: Optional[int] = None, pages: Optional[str] = None,
+                    time_budget: Optional[float] = None,
+                    sample: Optional[int] = None) -> Optional["ExtractionBudget"]:
+        """
+        Build a budget from request parameters.
+
+        Args:
+            max_pages: Maximum number of pages to read
+            pages: Page range specification (see parse_page_ranges)
+            time_budget: Seconds allowed for reading pages
+            sample: Sampling size N
+
+        Returns:
+            ExtractionBudget, or None when no limit was requested
+
+        Raises:
+            ValueError: If a parameter is out of range
+        """
+        if max_pages is None and pages is None and time_budget is None and sample is None:
+            return None
+        if max_pages is not None and max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("time_budget must be positive")
+        if sample is not None and sample < 1:
+            raise ValueError("sample must be at least 1")
+        page_ranges = parse_page_ranges(pages) if pages is not None else None
+        return cls(max_pages=max_pages, page_ranges=page_ranges, time_budget=time_budget, sample_pages=sample)
+
+    def select(self, page_count: int) -> List[int]:
+        """
+        Choose the pages to read.
+
+        Args:
+            page_count: Number of pages in the document
+
+        Returns:
+            Sorted 0-based page indices
+        """
+        if self.page_ranges is None:
+            candidates = list(range(page_count))
+        else:
+            chosen = set()
+            for first, last in self.page_ranges:
+                end = page_count if last is None else min(last, page_count)
+                chosen.update(range(first - 1, end))
+            candidates = sorted(chosen)
+
+        if self.sample_pages is not None and len(candidates) > 3 * self.sample_pages:
+            n = self.sample_pages
+            chosen = set(candidates[:n]) | set(candidates[-n:])
+            middle = candidates[n:-n]
+            step = len(middle) / (n + 1)
+            chosen.update(middle[int(step * (i + 1))] for i in range(n))
+            candidates = sorted(chosen)
+
+        if self.max_pages is not None:
+            candidates = candidates[:self.max_pages]
+        return candidates
+
+    def max_selected_pages(self, page_count: int) -> int:
+        """Number of pages select() would return (used for cost estimates)."""
+        return len(self.select(page_count))
+
+    def start(self) -> None:
+        """Start the wall-clock budget."""
+        self.started = time.monotonic()
+        if self.time_budget is not None:
+            self.deadline = self.started + self.time_budget
+
+    def plan(self, page_count: int) -> List[int]:
+        """
+        Record the document's page count and return the pages to read.
+
+        Args:
+            page_count: Number of pages in the document
+
+        Returns:
+            Sorted 0-based page indices
+        """
+        if self.started is None:
+            self.start()
+        self.page_count = page_count
+        pages = self.select(page_count)
+        self.selected = len(pages)
+        if len(pages) < page_count:
+            self.stopped_by = "page_selection"
+        return pages
+
+    def expired(self) -> bool:
+        """Whether the time budget has run out."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def covered(self, page_index: int) -> None:
+        """Record that a page (0-based) was read."""
+        self.pages_read.append(page_index + 1)
+
+    def stop(self, reason: str) -> None:
+        """Record why reading stopped before the selection was exhausted."""
+        self.stopped_by = reason
+
+    @property
+    def complete(self) -> bool:
+        """Whether every page of the document was read."""
+        return self.page_count is not None and len(self.pages_read) == self.page_count
+
+    def coverage(self) -> Dict:
+        """
+        Describe which pages the result is based on.
+
+        Returns:
+            Dictionary with the page count, the pages read as [first, last]
+            runs, whether the document was covered completely and, if not,
+            what stopped extraction ('page_selection' or 'time_budget')
+        """
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        return {
+            "page_count": self.page_count,
+            "pages_selected": self.selected,
+            "pages_extracted": len(self.pages_read),
+            "pages": compress_pages(sorted(self.pages_read)),
+            "complete": self.complete,
+            "stopped_by": None if self.complete else self.stopped_by,
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+    @staticmethod
+    def full_coverage(page_count: int) -> Dict:
+        """
+        Coverage of a result known to span the whole document (e.g. from the cache).
+
+        Args:
+            page_count: Number of pages in the document
+
+        Returns:
+            Dictionary shaped like coverage()
+        """
+        return {
+            "page_count": page_count,
+            "pages_selected": page_count,
+            "pages_extracted": page_count,
+            "pages": [[1, page_count]] if page_count else [],
+            "complete": True,
+            "stopped_by": None,
+            "elapsed_seconds": 0.0,
+        }
@@ -8,11 +8,67 @@ This module handles:
 """
 
 import re
-from typing import Dict, List, Optional, Tuple
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
 import fitz  # PyMuPDF
-from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
+
+from document_view import DocumentView
+from extraction_budget import ExtractionBudget
+from profiling import stage
+
+# Version of the extraction logic. Bump this whenever the regex patterns or the
+# result structure change so cached results from older code are not reused.
+EXTRACTOR_VERSION = "1.0.0"
+
+# Output fields filled by the NER model and by the regex/keyword extractors
+NER_FIELDS = ("name", "organization", "location")
+PATTERN_FIELDS = (
+    "dates", "emails", "phone_numbers", "ids", "money_salary", "urls",
+    "file_numbers", "percentages", "job_titles", "skills", "addresses",
+)
+RESULT_FIELDS = NER_FIELDS + PATTERN_FIELDS
+
+# Model name that selects the deterministic StubNERPipeline instead of a
+# Hugging Face model (used by the load-testing harness)
+STUB_MODEL_NAME = "stub"
+
+
+class StubNERPipeline:
+    """
+    Deterministic stand-in for the Hugging Face NER pipeline.
+    
+    Tags capitalized word pairs as persons and capitalized words followed by
+    a company suffix as organizations. It needs no model download, no torch
+    and no network, so load tests run fast and reproducibly anywhere.
+    """
+    
+    ORG_PATTERN = re.compile(r'\b(?:[A-Z][A-Za-z&]+\s+)+(?:Inc|Corp|Corporation|Ltd|LLC|Technologies)\b')
+    PERSON_PATTERN = re.compile(r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b')
+    
+    def __call__(self, text: str) -> List[Dict]:
+        entities = []
+        taken = []
+        for match in self.ORG_PATTERN.finditer(text):
+            entities.append(self._entity("ORG", match))
+            taken.append((match.start(), match.end()))
+        for match in self.PERSON_PATTERN.finditer(text):
+            if not any(start <= match.start() < end for start, end in taken):
+                entities.append(self._entity("PER", match))
+        entities.sort(key=lambda entity: entity["start"])
+        return entities
+    
+    @staticmethod
+    def _entity(group: str, match) -> Dict:
+        return {
+            "entity_group": group,
+            "word": match.group(0),
+            "score": 1.0,
+            "start": match.start(),
+            "end": match.end(),
+        }
 
 
 class DocumentExtractor:
@@ -28,7 +84,8 @@ class DocumentExtractor:
         Initialize the DocumentExtractor with a NER model.
         
         Args:
-            model_name: Hugging Face model identifier for NER
+            model_name: Hugging Face model identifier for NER, or "stub" for
+                the deterministic StubNERPipeline
         """
         self.model_name = model_name
         self.ner_pipeline = None
@@ -36,10 +93,16 @@ class DocumentExtractor:
     
     def _load_model(self):
         """Load the NER model pipeline."""
+        if self.model_name == STUB_MODEL_NAME:
+            print("Using deterministic stub NER pipeline")
+            self.ner_pipeline = StubNERPipeline()
+            return
+        
         try:
             print(f"Loading NER model: {self.model_name}")
             # Explicitly use PyTorch framework
             import torch
+            from transformers import pipeline
             self.ner_pipeline = pipeline(
                 "ner",
                 model=self.model_name,
@@ -50,12 +113,56 @@ class DocumentExtractor:
         except Exception as e:
             raise RuntimeError(f"Failed to load NER model: {str(e)}")
     
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
+    @property
+    def cache_version(self) -> str:
+        """
+        Identifier of the code and model that produce extraction results.
+        
+        Cached results are only valid for the version that produced them.
+        """
+        return f"{EXTRACTOR_VERSION}:{self.model_name}"
+    
+    @staticmethod
+    def compute_document_hash(file_content: bytes) -> str:
+        """
+        Compute the cache key hash of a document.
+        
+        Args:
+            file_content: File content as bytes
+            
+        Returns:
+            SHA-256 hex digest of the content
+        """
+        return hashlib.sha256(file_content).hexdigest()
+    
+    @staticmethod
+    def compute_file_hash(path: Path, block_size: int = 1024 * 1024) -> str:
+        """
+        Compute the cache key hash of a document stored on disk.
+        
+        The file is hashed block by block so it never has to fit in memory.
+        The digest matches compute_document_hash() for the same bytes.
+        
+        Args:
+            path: Path to the document
+            block_size: Number of bytes read per block
+            
+        Returns:
+            SHA-256 hex digest of the file content
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def extract_text_from_pdf(self, file_content: Union[bytes, Path]) -> str:
         """
         Extract raw text from a PDF file.
         
         Args:
-            file_content: PDF file content as bytes
+            file_content: PDF file content as bytes, or a Path to a PDF on disk
+                (opened directly by PyMuPDF without reading it into memory)
             
         Returns:
             Extracted text as a string
@@ -63,30 +170,122 @@ class DocumentExtractor:
         Raises:
             ValueError: If PDF extraction fails
         """
-        try:
+        return self.extract_pdf_view(file_content).text
+    
+    @staticmethod
+    def iter_pdf_pages(file_content: Union[bytes, Path],
+                       budget: Optional[ExtractionBudget] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Yield the text of a PDF one page at a time.
+        
+        Each page object is dropped as soon as its text has been read, so
+        MuPDF's per-page resources are held for one page at most. The
+        document is closed when the iteration ends for any reason (finished,
+        failed or abandoned).
+        
+        Args:
+            file_content: PDF file content as bytes, or a Path to a PDF on disk
+            budget: Optional budget selecting the pages to read; pages are not
+                opened once its time budget has run out
+            
+        Yields:
+            Tuples of (1-based page number, page text), in page order
+        """
+        if isinstance(file_content, Path):
+            doc = fitz.open(str(file_content), filetype="pdf")
+        else:
             doc = fitz.open(stream=file_content, filetype="pdf")
+        try:
+            if budget is None:
+                page_indices = range(doc.page_count)
+            else:
+                page_indices = budget.plan(doc.page_count)
+            
+            for page_num in page_indices:
+                if budget is not None:
+                    if budget.expired():
+                        budget.stop("time_budget")
+                        return
+                    budget.covered(page_num)
+                page = doc.load_page(page_num)
+                try:
+                    text = page.get_text()
+                finally:
+                    del page
+                yield page_num + 1, text
+        finally:
+            doc.close()
+            # Drop cached fonts and images once no page needs them
+            fitz.TOOLS.store_shrink(100)
+    
+    def extract_pdf_view(self, file_content: Union[bytes, Path],
+                         budget: Optional[ExtractionBudget] = None) -> DocumentView:
+        """
+        Extract the text of a PDF file together with the offset of each page.
+        
+        Pages are consumed as they are read, and leading and trailing
+        whitespace is trimmed on the fly, so the only full-size copies are
+        the page texts and the final joined text.
+        
+        Args:
+            file_content: PDF file content as bytes, or a Path to a PDF on disk
+            budget: Optional budget limiting which pages are read
+            
+        Returns:
+            DocumentView of the extracted text
+            
+        Raises:
+            ValueError: If PDF extraction fails
+        """
+        pages = self.iter_pdf_pages(file_content, budget)
+        try:
             text_parts = []
+            page_starts = []
+            page_numbers = []
+            # Length of the text so far, including the separator before the next page
+            position = 0
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text_parts.append(page.get_text())
+            for page_number, page_text in pages:
+                page_numbers.append(page_number)
+                if not text_parts:
+                    # Leading whitespace is stripped, so pages before the first
+                    # non-blank one start at offset 0 and contribute nothing
+                    page_starts.append(0)
+                    page_text = page_text.lstrip()
+                    if not page_text:
+                        continue
+                else:
+                    page_starts.append(position)
+                text_parts.append(page_text)
+                position += len(page_text) + 1
             
-            doc.close()
-            text = "\n".join(text_parts).strip()
+            # Trailing whitespace may span several blank pages
+            while text_parts and not text_parts[-1].strip():
+                text_parts.pop()
+            if text_parts:
+                text_parts[-1] = text_parts[-1].rstrip()
             
-            if not text:
+            text = "\n".join(text_parts)
+            del text_parts
+            
+            # A budgeted read may legitimately land on blank pages only
+            if not text and (budget is None or budget.complete):
                 raise ValueError("PDF appears to be empty or contains no extractable text")
             
-            return text
+            if budget is None:
+                return DocumentView(text, page_starts)
+            return DocumentView(text, page_starts, page_numbers)
         except Exception as e:
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+        finally:
+            pages.close()
     
-    def extract_text_from_txt(self, file_content: bytes) -> str:
+    def extract_text_from_txt(self, file_content: Union[bytes, Path]) -> str:
         """
         Extract text from a TXT file.
         
         Args:
-            file_content: TXT file content as bytes
+            file_content: TXT file content as bytes, or a Path to a TXT file on disk
             
         Returns:
             Text content as a string
@@ -95,6 +294,9 @@ class DocumentExtractor:
             ValueError: If text extraction fails
         """
         try:
+            if isinstance(file_content, Path):
+                file_content = file_content.read_bytes()
+            
             # Try UTF-8 first, fallback to latin-1 if needed
             try:
                 text = file_content.decode('utf-8')
@@ -110,12 +312,12 @@ class DocumentExtractor:
         except Exception as e:
             raise ValueError(f"Failed to extract text from TXT file: {str(e)}")
     
-    def extract_text(self, file_content: bytes, file_extension: str) -> str:
+    def extract_text(self, file_content: Union[bytes, Path], file_extension: str) -> str:
         """
         Extract text from a document based on file type.
         
         Args:
-            file_content: File content as bytes
+            file_content: File content as bytes, or a Path to the file on disk
             file_extension: File extension (e.g., 'pdf', 'txt')
             
         Returns:
@@ -133,16 +335,77 @@ class DocumentExtractor:
         else:
             raise ValueError(f"Unsupported file type: {file_extension}. Supported types: pdf, txt")
     
-    def extract_entities(self, text: str) -> List[Dict]:
+    def extract_document_view(self, file_content: Union[bytes, Path], file_extension: str,
+                              budget: Optional[ExtractionBudget] = None) -> DocumentView:
+        """
+        Extract a document's text as a DocumentView (with page offsets for PDFs).
+        
+        Args:
+            file_content: File content as bytes, or a Path to the file on disk
+            file_extension: File extension (e.g., 'pdf', 'txt')
+            budget: Optional budget limiting which PDF pages are read; a TXT
+                file counts as a single page
+            
+        Returns:
+            DocumentView of the extracted text
+            
+        Raises:
+            ValueError: If file type is unsupported or extraction fails
+        """
+        if budget is not None:
+            budget.start()
+        if file_extension.lower().lstrip('.') == 'pdf':
+            return self.extract_pdf_view(file_content, budget)
+        view = DocumentView(self.extract_text(file_content, file_extension))
+        if budget is not None:
+            budget.plan(1)
+            budget.covered(0)
+        return view
+    
+    @staticmethod
+    def _keep_unique(view: DocumentView, field: str, matches, normalize=None,
+                     key=str.lower, min_length: int = 1) -> List[str]:
+        """
+        Deduplicate matches in order, recording where each kept value was found.
+        
+        Args:
+            view: Document view the matches came from
+            field: Output field name
+            matches: Iterable of (value, start, end) tuples
+            normalize: Optional function applied to each value
+            key: Function giving the deduplication key (None to use the value itself)
+            min_length: Minimum length of a kept value
+            
+        Returns:
+            List of unique values in match order
+        """
+        seen = set()
+        unique = []
+        for value, start, _ in matches:
+            if normalize is not None:
+                value = normalize(value)
+            if len(value) < min_length:
+                continue
+            value_key = key(value) if key is not None else value
+            if value_key not in seen:
+                seen.add(value_key)
+                unique.append(value)
+                view.record(field, value, start)
+        return unique
+    
+    def extract_entities(self, text: Union[str, DocumentView]) -> List[Dict]:
         """
         Extract named entities from text using the NER model.
         
         Args:
-            text: Input text to process
+            text: Input text to process, or its DocumentView
             
         Returns:
             List of entity dictionaries with 'entity_group' and 'word' keys
         """
+        if isinstance(text, DocumentView):
+            text = text.text
+        
         if not text:
             return []
         
@@ -158,7 +421,7 @@ class DocumentExtractor:
         except Exception as e:
             raise RuntimeError(f"NER extraction failed: {str(e)}")
     
-    def extract_dates(self, text: str) -> List[str]:
+    def extract_dates(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract dates from text using regex patterns.
         
@@ -169,7 +432,7 @@ class DocumentExtractor:
         - DD-MM-YYYY
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted date strings
@@ -184,44 +447,36 @@ class DocumentExtractor:
             r'\b\d{4}-\d{2}-\d{2}\b',
         ]
         
-        dates = []
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            dates.extend(matches)
+        view = DocumentView.of(text)
+        if not view.has_digit:
+            return []
         
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_dates = []
-        for date in dates:
-            if date.lower() not in seen:
-                seen.add(date.lower())
-                unique_dates.append(date)
+        matches = (match for pattern in date_patterns
+                   for match in view.find_all(pattern, re.IGNORECASE))
         
-        return unique_dates
+        # Remove duplicates while preserving order
+        return self._keep_unique(view, "dates", matches)
     
-    def extract_emails(self, text: str) -> List[str]:
+    def extract_emails(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract email addresses from text using regex pattern.
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted email addresses
         """
+        view = DocumentView.of(text)
+        if not view.has_at_sign:
+            return []
+        
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text, re.IGNORECASE)
+        matches = view.find_all(email_pattern, re.IGNORECASE)
         # Remove duplicates while preserving order
-        seen = set()
-        unique_emails = []
-        for email in emails:
-            email_lower = email.lower()
-            if email_lower not in seen:
-                seen.add(email_lower)
-                unique_emails.append(email)
-        return unique_emails
+        return self._keep_unique(view, "emails", matches)
     
-    def extract_phone_numbers(self, text: str) -> List[str]:
+    def extract_phone_numbers(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract phone numbers from text using regex patterns.
         
@@ -234,7 +489,7 @@ class DocumentExtractor:
         - +91 12345 67890 (Indian format)
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted phone numbers
@@ -246,24 +501,22 @@ class DocumentExtractor:
             r'\(\d{3}\)\s?\d{3}[-.]?\d{4}',  # (123) 456-7890
         ]
         
-        phones = []
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text)
-            phones.extend(matches)
+        view = DocumentView.of(text)
+        if not view.has_digit:
+            return []
+        
+        matches = (match for pattern in phone_patterns
+                   for match in view.find_all(pattern))
         
         # Remove duplicates while preserving order
-        seen = set()
-        unique_phones = []
-        for phone in phones:
-            # Normalize phone number (remove spaces, keep formatting)
-            normalized = re.sub(r'\s+', ' ', phone.strip())
-            if normalized not in seen:
-                seen.add(normalized)
-                unique_phones.append(normalized)
-        
-        return unique_phones
+        # Normalize phone number (remove spaces, keep formatting)
+        return self._keep_unique(
+            view, "phone_numbers", matches,
+            normalize=lambda phone: re.sub(r'\s+', ' ', phone.strip()),
+            key=None
+        )
     
-    def extract_ids(self, text: str) -> List[str]:
+    def extract_ids(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract ID numbers (Aadhar, SSN, etc.) from text using regex patterns.
         
@@ -274,7 +527,7 @@ class DocumentExtractor:
         - Generic ID patterns
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted ID numbers
@@ -287,23 +540,21 @@ class DocumentExtractor:
             r'\b\d{12}\b',  # 12-digit ID (Aadhar without spaces)
         ]
         
-        ids = []
-        for pattern in id_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            ids.extend(matches)
+        view = DocumentView.of(text)
+        if not view.has_digit:
+            return []
         
-        # Remove duplicates
-        seen = set()
-        unique_ids = []
-        for id_num in ids:
-            normalized = id_num.upper().strip()
-            if normalized not in seen:
-                seen.add(normalized)
-                unique_ids.append(normalized)
+        matches = (match for pattern in id_patterns
+                   for match in view.find_all(pattern, re.IGNORECASE))
         
-        return unique_ids
+        # Remove duplicates
+        return self._keep_unique(
+            view, "ids", matches,
+            normalize=lambda id_num: id_num.upper().strip(),
+            key=None
+        )
     
-    def extract_money_salary(self, text: str) -> List[str]:
+    def extract_money_salary(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract money amounts and salaries from text using regex patterns.
         
@@ -316,7 +567,7 @@ class DocumentExtractor:
         - Salary ranges: $50,000 - $70,000
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted money/salary amounts
@@ -330,52 +581,40 @@ class DocumentExtractor:
             r'[\d,]+(?:\.\d{2})?\s?(?:per\s+)?(?:year|month|annum|annually|monthly)',  # Per year/month
         ]
         
-        money = []
-        for pattern in money_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            money.extend(matches)
+        view = DocumentView.of(text)
+        matches = (match for pattern in money_patterns
+                   for match in view.find_all(pattern, re.IGNORECASE))
         
         # Remove duplicates
-        seen = set()
-        unique_money = []
-        for amount in money:
-            normalized = amount.strip()
-            if normalized.lower() not in seen:
-                seen.add(normalized.lower())
-                unique_money.append(normalized)
-        
-        return unique_money
+        return self._keep_unique(view, "money_salary", matches, normalize=str.strip)
     
-    def extract_urls(self, text: str) -> List[str]:
+    def extract_urls(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract URLs from text using regex pattern.
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted URLs
         """
+        view = DocumentView.of(text)
+        matches = []
+        
         url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:\w)*)?)?'
-        urls = re.findall(url_pattern, text, re.IGNORECASE)
+        if view.contains('http'):
+            matches.extend(view.find_all(url_pattern, re.IGNORECASE))
         
         # Also match www. URLs
         www_pattern = r'www\.(?:[-\w.])+(?:/(?:[\w/_.])*)?'
-        www_urls = re.findall(www_pattern, text, re.IGNORECASE)
-        urls.extend(['http://' + url for url in www_urls])
+        if view.contains('www.'):
+            matches.extend(('http://' + url, start, end)
+                           for url, start, end in view.find_all(www_pattern, re.IGNORECASE))
         
         # Remove duplicates
-        seen = set()
-        unique_urls = []
-        for url in urls:
-            url_lower = url.lower()
-            if url_lower not in seen:
-                seen.add(url_lower)
-                unique_urls.append(url)
-        
-        return unique_urls
+        return self._keep_unique(view, "urls", matches)
     
-    def extract_file_numbers(self, text: str) -> List[str]:
+    def extract_file_numbers(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract file numbers, case numbers, reference numbers from text.
         
@@ -386,7 +625,7 @@ class DocumentExtractor:
         - Document ID: DOC-2024-001
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted file numbers
@@ -398,23 +637,18 @@ class DocumentExtractor:
             r'\b[A-Z]{2,}\d{4,}\b',  # Format: ABC1234
         ]
         
-        file_nums = []
-        for pattern in file_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            file_nums.extend(matches)
+        view = DocumentView.of(text)
+        if not view.has_digit:
+            # Only the prefixed pattern can match without digits
+            file_patterns = file_patterns[:1]
         
-        # Remove duplicates
-        seen = set()
-        unique_files = []
-        for file_num in file_nums:
-            normalized = file_num.strip()
-            if normalized.upper() not in seen:
-                seen.add(normalized.upper())
-                unique_files.append(normalized)
+        matches = (match for pattern in file_patterns
+                   for match in view.find_all(pattern, re.IGNORECASE))
         
-        return unique_files
+        # Remove duplicates
+        return self._keep_unique(view, "file_numbers", matches, normalize=str.strip, key=str.upper)
     
-    def extract_percentages(self, text: str) -> List[str]:
+    def extract_percentages(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract percentages from text using regex pattern.
         
@@ -424,7 +658,7 @@ class DocumentExtractor:
         - 50.5%
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted percentages
@@ -434,28 +668,22 @@ class DocumentExtractor:
             r'\b\d+(?:\.\d+)?\s+percent\b',  # 50 percent
         ]
         
-        percentages = []
-        for pattern in percentage_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            percentages.extend(matches)
+        view = DocumentView.of(text)
+        if not view.has_digit:
+            return []
         
-        # Remove duplicates
-        seen = set()
-        unique_percentages = []
-        for pct in percentages:
-            normalized = pct.strip()
-            if normalized.lower() not in seen:
-                seen.add(normalized.lower())
-                unique_percentages.append(normalized)
+        matches = (match for pattern in percentage_patterns
+                   for match in view.find_all(pattern, re.IGNORECASE))
         
-        return unique_percentages
+        # Remove duplicates
+        return self._keep_unique(view, "percentages", matches, normalize=str.strip)
     
-    def extract_job_titles(self, text: str) -> List[str]:
+    def extract_job_titles(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract job titles from text using contextual patterns and keywords.
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted job titles
@@ -468,36 +696,32 @@ class DocumentExtractor:
             r'\b(?:CEO|CTO|CFO|COO|VP|President|Manager|Director|Head|Lead)\b',
         ]
         
+        view = DocumentView.of(text)
         job_titles = []
         for pattern in job_title_keywords:
-            matches = re.findall(pattern, text)
-            job_titles.extend(matches)
+            job_titles.extend(view.find_all(pattern))
         
         # Also look for titles after "Position:", "Role:", "Title:", etc.
+        context_keywords = ['position', 'role', 'title', 'designation', 'job']
         context_patterns = [
             r'(?:position|role|title|designation|job)[:\s]+([A-Z][A-Za-z\s&]+)',
         ]
-        for pattern in context_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            job_titles.extend(matches)
+        if any(view.contains(keyword) for keyword in context_keywords):
+            for pattern in context_patterns:
+                job_titles.extend(view.find_all(pattern, re.IGNORECASE))
         
         # Remove duplicates and normalize
-        seen = set()
-        unique_titles = []
-        for title in job_titles:
-            normalized = ' '.join(title.split()).strip()
-            if normalized and normalized.lower() not in seen:
-                seen.add(normalized.lower())
-                unique_titles.append(normalized)
-        
-        return unique_titles
+        return self._keep_unique(
+            view, "job_titles", job_titles,
+            normalize=lambda title: ' '.join(title.split())
+        )
     
-    def extract_skills(self, text: str) -> List[str]:
+    def extract_skills(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract skills from text using domain-specific keywords and patterns.
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted skills
@@ -516,39 +740,33 @@ class DocumentExtractor:
             r'\b(?:Machine Learning|Deep Learning|Data Science|Big Data|Analytics|Agile|Scrum|DevOps|Microservices|REST API|GraphQL)\b',
         ]
         
+        view = DocumentView.of(text)
         skills = []
         for pattern in skill_keywords:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            skills.extend(matches)
+            skills.extend(view.find_all(pattern, re.IGNORECASE))
         
         # Also look for skills in lists (after "Skills:", "Technical Skills:", etc.)
+        context_keywords = ['skill', 'technolog', 'expertise', 'proficiency']
         context_patterns = [
             r'(?:skills?|technologies?|expertise|proficiency)[:\s]+([A-Za-z,\s&]+)',
         ]
-        for pattern in context_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            # Split comma-separated skills
-            for match in matches:
-                skill_list = [s.strip() for s in match.split(',')]
-                skills.extend(skill_list)
+        if any(view.contains(keyword) for keyword in context_keywords):
+            for pattern in context_patterns:
+                # Split comma-separated skills, keeping each item's offset
+                for match, start, _ in view.find_all(pattern, re.IGNORECASE):
+                    for item in match.split(','):
+                        skills.append((item, start, start + len(item)))
+                        start += len(item) + 1
         
         # Remove duplicates and normalize
-        seen = set()
-        unique_skills = []
-        for skill in skills:
-            normalized = skill.strip()
-            if normalized and len(normalized) > 1 and normalized.lower() not in seen:
-                seen.add(normalized.lower())
-                unique_skills.append(normalized)
-        
-        return unique_skills
+        return self._keep_unique(view, "skills", skills, normalize=str.strip, min_length=2)
     
-    def extract_addresses(self, text: str) -> List[str]:
+    def extract_addresses(self, text: Union[str, DocumentView]) -> List[str]:
         """
         Extract addresses from text using multi-line pattern matching.
         
         Args:
-            text: Input text
+            text: Input text, or its DocumentView
             
         Returns:
             List of extracted addresses
@@ -565,38 +783,39 @@ class DocumentExtractor:
             r'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd),\s*[A-Za-z\s]+,\s*[A-Z]{2}',
         ]
         
+        view = DocumentView.of(text)
+        # Every address pattern and the keyword fallback require a digit
+        if not view.has_digit:
+            return []
+        
         addresses = []
         for pattern in address_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            addresses.extend(matches)
+            addresses.extend(view.find_all(pattern, re.IGNORECASE))
         
         # Also look for addresses after keywords
         context_keywords = ['address', 'location', 'residence', 'office', 'headquarters']
         for keyword in context_keywords:
+            if not view.contains(keyword):
+                continue
             # Find text after keyword (up to 3 lines or 200 chars)
             pattern = rf'{keyword}[:\s]+([A-Za-z0-9\s,.-]{{10,200}})'
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
+            for match, start, end in view.find_all(pattern, re.IGNORECASE):
                 # Clean up the match
                 cleaned = ' '.join(match.split())
-                if len(cleaned) > 10 and any(char.isdigit() for char in cleaned):
-                    addresses.append(cleaned)
+                if len(cleaned) > 10 and view.has_digit_between(start, end):
+                    addresses.append((cleaned, start, end))
         
         # Remove duplicates
-        seen = set()
-        unique_addresses = []
-        for addr in addresses:
-            normalized = ' '.join(addr.split()).strip()
-            if normalized and normalized.lower() not in seen:
-                seen.add(normalized.lower())
-                unique_addresses.append(normalized)
-        
-        return unique_addresses
+        return self._keep_unique(
+            view, "addresses", addresses,
+            normalize=lambda addr: ' '.join(addr.split())
+        )
     
     def structure_entities(self, entities: List[Dict], dates: List[str], emails: List[str], 
                           phones: List[str], ids: List[str], money: List[str], urls: List[str],
                           file_numbers: List[str], percentages: List[str], job_titles: List[str],
-                          skills: List[str], addresses: List[str]) -> Dict:
+                          skills: List[str], addresses: List[str],
+                          view: Optional[DocumentView] = None) -> Dict:
         """
         Structure extracted entities into a clean JSON format.
         
@@ -613,6 +832,7 @@ class DocumentExtractor:
             job_titles: List of extracted job titles
             skills: List of extracted skills
             addresses: List of extracted addresses
+            view: Optional DocumentView on which to record where NER entities were found
             
         Returns:
             Dictionary with structured entity fields
@@ -667,16 +887,58 @@ class DocumentExtractor:
                 if normalized_word not in seen_entities[field_name]:
                     seen_entities[field_name].add(normalized_word)
                     result[field_name].append(normalized_word)
+                    if view is not None and entity.get("start") is not None:
+                        view.record(field_name, normalized_word, int(entity["start"]))
         
         return result
     
-    def extract(self, file_content: bytes, file_extension: str) -> Dict:
+    @staticmethod
+    def resolve_fields(fields: Optional[List[str]]) -> Tuple[str, ...]:
+        """
+        Validate a list of requested output fields.
+        
+        Args:
+            fields: Requested field names, or None for all fields
+            
+        Returns:
+            Tuple of requested field names in result order
+            
+        Raises:
+            ValueError: If an unknown field is requested
+        """
+        if fields is None:
+            return RESULT_FIELDS
+        
+        unknown = [field for field in fields if field not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s): {', '.join(unknown)}. Supported fields: {', '.join(RESULT_FIELDS)}"
+            )
+        return tuple(field for field in RESULT_FIELDS if field in fields)
+    
+    @staticmethod
+    def _run_extractor(field: str, requested: Tuple[str, ...], method, view: DocumentView) -> List[str]:
+        """Run one field extractor as a profiling stage, or skip it if the field was not requested."""
+        if field not in requested:
+            return []
+        with stage(field):
+            return method(view)
+    
+    def extract(self, file_content: Union[bytes, Path], file_extension: str,
+                fields: Optional[List[str]] = None, include_positions: bool = False,
+                budget: Optional[ExtractionBudget] = None) -> Dict:
         """
         Main extraction method that processes a document and returns structured entities.
         
         Args:
-            file_content: File content as bytes
+            file_content: File content as bytes, or a Path to the file on disk
             file_extension: File extension (e.g., 'pdf', 'txt')
+            fields: Optional list of output fields to extract; extractors for
+                other fields are skipped and the fields are left out of the result
+            include_positions: Add a "positions" entry giving the offset, page
+                and line at which each extracted value was found
+            budget: Optional page/time budget; when given, only the pages it
+                selects are read and a "coverage" entry describes them
             
         Returns:
             Dictionary with structured entity extraction results
@@ -684,36 +946,74 @@ class DocumentExtractor:
         Raises:
             ValueError: If file processing fails
         """
+        self.resolve_fields(fields)
+        
         # Extract text from document
-        text = self.extract_text(file_content, file_extension)
+        with stage("text_extraction"):
+            view = self.extract_document_view(file_content, file_extension, budget)
+        
+        result = self.extract_from_text(view, fields, include_positions)
+        if budget is not None:
+            result["coverage"] = budget.coverage()
+        return result
+    
+    def extract_from_text(self, text: Union[str, DocumentView], fields: Optional[List[str]] = None,
+                          include_positions: bool = False) -> Dict:
+        """
+        Run entity extraction over already extracted document text.
         
-        # Extract entities using NER model
-        entities = self.extract_entities(text)
+        Every extractor shares one DocumentView of the text, so derived
+        representations are computed once per document.
+        
+        Args:
+            text: Document text, or its DocumentView
+            fields: Optional list of output fields to extract
+            include_positions: Add a "positions" entry (see extract())
+            
+        Returns:
+            Dictionary with structured entity extraction results
+        """
+        requested = self.resolve_fields(fields)
+        view = DocumentView.of(text)
+        
+        # Extract entities using NER model (skipped when no NER field is requested)
+        if any(field in requested for field in NER_FIELDS):
+            with stage("ner"):
+                entities = self.extract_entities(view)
+        else:
+            entities = []
         
         # Extract dates using regex
-        dates = self.extract_dates(text)
+        dates = self._run_extractor("dates", requested, self.extract_dates, view)
         
         # Extract pattern-based entities
-        emails = self.extract_emails(text)
-        phones = self.extract_phone_numbers(text)
-        ids = self.extract_ids(text)
-        money = self.extract_money_salary(text)
-        urls = self.extract_urls(text)
-        file_numbers = self.extract_file_numbers(text)
-        percentages = self.extract_percentages(text)
+        emails = self._run_extractor("emails", requested, self.extract_emails, view)
+        phones = self._run_extractor("phone_numbers", requested, self.extract_phone_numbers, view)
+        ids = self._run_extractor("ids", requested, self.extract_ids, view)
+        money = self._run_extractor("money_salary", requested, self.extract_money_salary, view)
+        urls = self._run_extractor("urls", requested, self.extract_urls, view)
+        file_numbers = self._run_extractor("file_numbers", requested, self.extract_file_numbers, view)
+        percentages = self._run_extractor("percentages", requested, self.extract_percentages, view)
         
         # Extract contextual entities
-        job_titles = self.extract_job_titles(text)
-        skills = self.extract_skills(text)
+        job_titles = self._run_extractor("job_titles", requested, self.extract_job_titles, view)
+        skills = self._run_extractor("skills", requested, self.extract_skills, view)
         
         # Extract complex entities
-        addresses = self.extract_addresses(text)
+        addresses = self._run_extractor("addresses", requested, self.extract_addresses, view)
         
         # Structure the results
-        structured_result = self.structure_entities(
-            entities, dates, emails, phones, ids, money, urls,
-            file_numbers, percentages, job_titles, skills, addresses
-        )
+        with stage("structure"):
+            structured_result = self.structure_entities(
+                entities, dates, emails, phones, ids, money, urls,
+                file_numbers, percentages, job_titles, skills, addresses, view=view
+            )
+        
+        if fields is not None:
+            structured_result = {field: structured_result[field] for field in requested}
+        
+        if include_positions:
+            structured_result["positions"] = view.positions_for(requested)
         
         return structured_result
 
@@ -3,6 +3,43 @@ import { useDropzone } from 'react-dropzone';
 import axios from 'axios';
 import ResultsDisplay from './components/ResultsDisplay';
 
+const API_BASE_URL = 'http://localhost:8000';
+
+// Files above this size skip the pre-upload lookup: hashing reads the whole
+// file into memory, and the upload would then read it a second time.
+const LOOKUP_MAX_BYTES = 32 * 1024 * 1024;
+
+// Hash the file locally so the server can be asked for a cached result
+// before uploading it. Returns null where Web Crypto is unavailable
+// (e.g. non-secure contexts), in which case we just upload.
+const hashFile = async (file) => {
+  if (!window.crypto?.subtle) return null;
+  const buffer = await file.arrayBuffer();
+  const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+const getFileType = (filename) =>
+  filename.includes('.') ? filename.split('.').pop().toLowerCase() : '';
+
+// Ask the server for a cached result; resolves to null on a miss.
+const lookupCachedResult = async (file) => {
+  if (file.size > LOOKUP_MAX_BYTES) return null;
+  try {
+    const hash = await hashFile(file);
+    if (!hash) return null;
+    const response = await axios.get(`${API_BASE_URL}/extract/${hash}`, {
+      params: { file_type: getFileType(file.name) },
+    });
+    return response.data;
+  } catch (err) {
+    // 404 means a miss; any other failure falls back to a normal upload
+    return null;
+  }
+};
+
 function App() {
   const [file, setFile] = useState(null);
   const [results, setResults] = useState(null);
@@ -88,23 +125,29 @@ function App() {
     setError(null);
     setResults(null);
 
-    const formData = new FormData();
-    formData.append('file', file);
-
     try {
-      const response = await axios.post('http://localhost:8000/extract', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
-      setResults(response.data);
+      // Skip the upload entirely when the server already has this document
+      let data = await lookupCachedResult(file);
+
+      if (!data) {
+        const formData = new FormData();
+        formData.append('file', file);
+
+        const response = await axios.post(`${API_BASE_URL}/extract`, formData, {
+          headers: {
+            'Content-Type': 'multipart/form-data',
+          },
+        });
+        data = response.data;
+      }
+      setResults(data);
       
       // Add to history
       const newEntry = {
         id: Date.now(),
         filename: file.name,
         timestamp: new Date().toLocaleString(),
-        data: response.data
+        data
       };
       const updatedHistory = [newEntry, ...history].slice(0, 10); // Keep last 10
       setHistory(updatedHistory);
@@ -20,33 +20,224 @@ Example API Response:
     }
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from pydantic import BaseModel
+from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
+import asyncio
+import os
+import re
+import time
 import uvicorn
 
+from entity_index import EntityIndex
+from export import DEFAULT_BATCH_SIZE as DEFAULT_EXPORT_BATCH_SIZE, EXPORT_FORMATS, parse_since, stream_export
+from extraction_budget import ExtractionBudget
 from extractor import DocumentExtractor
+from negotiation import DecompressionMiddleware, choose_media_type, negotiated_response
+from profiling import SamplingProfiler, StageTimer, is_authorized, run_profiled
+from result_cache import ResultCache
+from scheduler import (
+    FairScheduler, count_pdf_pages, estimate_cost, parse_tenant_api_keys, parse_tenant_weights,
+    tenant_from_headers
+)
+from transport import SegmentHandle, segment_path
+from uploads import UploadManager, UploadNotFoundError
+from watch_folder import BackgroundIngestor, FolderWatcher
+from workers import ProcessPoolExtractor
 
 # Initialize the document extractor (loads model on startup)
 extractor: Optional[DocumentExtractor] = None
 
+# NER model to load; "stub" selects a deterministic pipeline for load testing
+NER_MODEL = os.environ.get("NER_MODEL", "dslim/bert-base-NER")
+
+# Optional pool of extraction worker processes (EXTRACTION_PROCESSES > 0).
+# Documents reach the workers through shared memory rather than pickling.
+EXTRACTION_PROCESSES = int(os.environ.get("EXTRACTION_PROCESSES", "0"))
+# Worker recycling limits (0 disables each limit)
+WORKER_MAX_TASKS = int(os.environ.get("WORKER_MAX_TASKS", "0"))
+WORKER_MAX_RSS_MB = float(os.environ.get("WORKER_MAX_RSS_MB", "0"))
+process_pool: Optional[ProcessPoolExtractor] = None
+
+# Cache of extraction results keyed by document SHA-256
+# (results pre-extracted from WATCH_DIRS are kept in a separate tier)
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_ENTRIES", "256")),
+    background_entries=int(os.environ.get("RESULT_CACHE_BACKGROUND_ENTRIES", "256"))
+)
+
+SHA256_PATTERN = re.compile(r'^[0-9a-fA-F]{64}$')
+SUPPORTED_EXTENSIONS = ['pdf', 'txt']
+
+# Tenant-fair, shortest-job-first admission in front of the extractor
+scheduler = FairScheduler(
+    max_concurrency=int(os.environ.get("EXTRACTION_CONCURRENCY", "2")),
+    tenant_weights=parse_tenant_weights(os.environ.get("TENANT_WEIGHTS")),
+    starvation_seconds=float(os.environ.get("SCHEDULER_STARVATION_SECONDS", "30"))
+)
+# X-API-Key values that identify a tenant ('tenant=key,...'); other keys are anonymous
+TENANT_API_KEYS = parse_tenant_api_keys(os.environ.get("TENANT_API_KEYS"))
+
+# Token required for ?profile=1 and the /admin endpoints (disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Always-on statistical sampling profiler (SAMPLING_PROFILER_INTERVAL=0 disables it)
+sampling_profiler = SamplingProfiler(
+    interval=float(os.environ.get("SAMPLING_PROFILER_INTERVAL", "0.02"))
+)
+
+# Persistent index of extracted entities behind /search (ENTITY_INDEX_PATH='' disables it)
+ENTITY_INDEX_PATH = os.environ.get("ENTITY_INDEX_PATH", "entity_index.db")
+entity_index: Optional[EntityIndex] = None
+
+# Directories whose documents are pre-extracted in the background
+# (separated by commas or os.pathsep; empty disables the watcher)
+WATCH_DIRS = [d for d in re.split(rf"[,{re.escape(os.pathsep)}]", os.environ.get("WATCH_DIRS", "")) if d.strip()]
+WATCH_BACKEND = os.environ.get("WATCH_BACKEND", "auto")
+WATCH_SETTLE_SECONDS = float(os.environ.get("WATCH_SETTLE_SECONDS", "2"))
+WATCH_POLL_SECONDS = float(os.environ.get("WATCH_POLL_SECONDS", "5"))
+WATCH_WORKERS = int(os.environ.get("WATCH_WORKERS", "1"))
+folder_watcher: Optional[FolderWatcher] = None
+background_ingestor: Optional[BackgroundIngestor] = None
+background_pool: Optional[ProcessPoolExtractor] = None
+
+# Cap on the decompressed size of a request sent with Content-Encoding
+REQUEST_MAX_DECOMPRESSED_MB = int(os.environ.get("REQUEST_MAX_DECOMPRESSED_MB", "1024"))
+
+# Resumable chunked uploads for very large documents
+upload_manager = UploadManager(ttl_seconds=3600)
+UPLOAD_SWEEP_INTERVAL_SECONDS = 60
+
+
+async def sweep_expired_uploads():
+    """Periodically garbage-collect abandoned upload sessions."""
+    while True:
+        await asyncio.sleep(UPLOAD_SWEEP_INTERVAL_SECONDS)
+        removed = await run_in_threadpool(upload_manager.sweep_expired)
+        if removed:
+            print(f"Removed {removed} expired upload session(s)")
+
+
+def find_result(document_hash: str, file_extension: str, version: str, lookup: bool = False) -> Optional[Dict]:
+    """
+    Fetch a precomputed full result: from the cache, or rebuilt from the entity index.
+    
+    Blocking (the index is read on a miss), so call it from the thread pool.
+    
+    Args:
+        document_hash: SHA-256 hex digest of the document
+        file_extension: File extension (e.g., 'pdf', 'txt')
+        version: Current extractor version
+        lookup: The request is a pre-upload lookup by hash
+        
+    Returns:
+        The result, or None if it has to be extracted
+    """
+    loader = None
+    if entity_index is not None:
+        index = entity_index
+        loader = lambda: index.get_result(document_hash.lower(), file_extension, version)
+    return result_cache.get(document_hash, file_extension, version, lookup=lookup, loader=loader)
+
+
+def is_known_document(document_hash: str, file_extension: str) -> bool:
+    """Whether find_result would return a result, so background extraction can skip the document."""
+    version = extractor.cache_version
+    if result_cache.contains(document_hash, file_extension, version):
+        return True
+    return entity_index is not None and entity_index.contains(document_hash, file_extension, version)
+
+
+def store_background_result(document_hash: str, file_extension: str, path, result) -> None:
+    """Make a pre-extracted result available to /extract and /search."""
+    version = extractor.cache_version
+    result_cache.put(document_hash, file_extension, version, result, background=True)
+    if entity_index is not None:
+        entity_index.add(document_hash, file_extension, result, path.name, version)
+
+
+async def start_folder_watcher() -> None:
+    """Start background pre-extraction of the WATCH_DIRS documents."""
+    global folder_watcher, background_ingestor, background_pool
+    # Dedicated workers at the lowest CPU priority, so user requests win any contention
+    background_pool = ProcessPoolExtractor(
+        WATCH_WORKERS, extractor.model_name,
+        max_tasks_per_worker=WORKER_MAX_TASKS,
+        max_worker_rss_mb=WORKER_MAX_RSS_MB,
+        nice=19
+    )
+    background_ingestor = BackgroundIngestor(
+        extract=background_pool.extract,
+        hash_file=extractor.compute_file_hash,
+        is_known=is_known_document,
+        store=store_background_result,
+        wait_for_idle=scheduler.wait_for_idle
+    )
+    background_ingestor.start()
+    folder_watcher = FolderWatcher(
+        WATCH_DIRS, background_ingestor.submit,
+        settle_seconds=WATCH_SETTLE_SECONDS,
+        poll_interval=WATCH_POLL_SECONDS,
+        backend=WATCH_BACKEND
+    )
+    folder_watcher.start()
+
+
+async def stop_folder_watcher() -> None:
+    """Stop watching and shut the background workers down."""
+    global folder_watcher, background_ingestor, background_pool
+    if folder_watcher is not None:
+        folder_watcher.stop()
+        folder_watcher = None
+    if background_ingestor is not None:
+        await background_ingestor.stop()
+        background_ingestor = None
+    if background_pool is not None:
+        await run_in_threadpool(background_pool.shutdown)
+        background_pool = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
-    global extractor
+    global extractor, process_pool, entity_index
     try:
-        extractor = DocumentExtractor()
+        extractor = DocumentExtractor(model_name=NER_MODEL)
         print("Document extractor initialized successfully")
     except Exception as e:
         print(f"Warning: Failed to initialize document extractor: {str(e)}")
         raise
+    if EXTRACTION_PROCESSES > 0:
+        process_pool = ProcessPoolExtractor(
+            EXTRACTION_PROCESSES, extractor.model_name,
+            max_tasks_per_worker=WORKER_MAX_TASKS,
+            max_worker_rss_mb=WORKER_MAX_RSS_MB
+        )
+        print(f"Started {EXTRACTION_PROCESSES} extraction worker process(es)")
+    if ENTITY_INDEX_PATH:
+        entity_index = EntityIndex(ENTITY_INDEX_PATH)
+        entity_index.start()
+    if sampling_profiler.interval > 0:
+        sampling_profiler.start()
+    sweeper = asyncio.create_task(sweep_expired_uploads())
+    if WATCH_DIRS:
+        await start_folder_watcher()
     yield
-    # Shutdown (if needed in the future)
-    # Cleanup code can go here
+    # Shutdown
+    await stop_folder_watcher()
+    sweeper.cancel()
+    sampling_profiler.stop()
+    if process_pool is not None:
+        process_pool.shutdown()
+        process_pool = None
+    if entity_index is not None:
+        entity_index.close()
+        entity_index = None
 
 
 # Initialize FastAPI app
@@ -57,6 +248,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Decode gzip/zstd request bodies as they stream in
+app.add_middleware(DecompressionMiddleware, max_size=REQUEST_MAX_DECOMPRESSED_MB * 1024 * 1024)
+
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
     CORSMiddleware,
@@ -64,6 +258,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "X-Extractor-Version", "X-Document-Hash"],
 )
 
 
@@ -75,6 +270,17 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /extract": "Extract information from PDF or TXT documents",
+            "GET /extract/{sha256}": "Fetch a cached result by document hash (HEAD also supported)",
+            "POST /uploads": "Start a resumable chunked upload",
+            "PUT /uploads/{id}": "Upload one byte range (Content-Range, X-Chunk-SHA256)",
+            "GET /uploads/{id}": "Query the current offset of an upload",
+            "DELETE /uploads/{id}": "Abort an upload and delete its spooled data",
+            "POST /uploads/{id}/finalize": "Run extraction on a completed upload",
+            "GET /search": "Find processed documents that mention an entity (admin only)",
+            "GET /metrics": "Cache, upload and scheduler statistics",
+            "GET /admin/profile/samples": "Sampling profiler stacks (collapsed or flamegraph, admin only)",
+            "POST /admin/index/compact": "Compact the entity index (admin only)",
+            "GET /export": "Columnar export of all indexed entities (Parquet or Arrow, admin only)",
             "GET /health": "Health check endpoint"
         }
     }
@@ -89,13 +295,452 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics, including the result cache hit ratio."""
+    metrics_data = {
+        "result_cache": result_cache.stats(),
+        "uploads": upload_manager.stats(),
+        "scheduler": scheduler.stats()
+    }
+    if process_pool is not None:
+        metrics_data["workers"] = process_pool.stats()
+    if entity_index is not None:
+        metrics_data["entity_index"] = await run_in_threadpool(entity_index.stats)
+    if folder_watcher is not None:
+        metrics_data["watch_folder"] = {
+            "watcher": folder_watcher.stats(),
+            "ingestion": background_ingestor.stats(),
+            "workers": background_pool.stats(),
+        }
+    return metrics_data
+
+
+def require_admin(request: Request) -> None:
+    """
+    Reject requests without a valid X-Admin-Token header.
+    
+    Raises:
+        HTTPException: 403 if the token is missing or wrong, or no ADMIN_TOKEN is configured
+    """
+    if not is_authorized(request.headers.get("x-admin-token"), ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Admin-Token header is required"
+        )
+
+
+@app.get("/admin/profile/samples")
+async def profile_samples(request: Request, format: str = "collapsed", reset: bool = False):
+    """
+    Export the hot stacks collected by the sampling profiler.
+    
+    Args:
+        format: 'collapsed' (flamegraph.pl / speedscope input) or 'flamegraph'
+            (nested JSON for d3-flame-graph)
+        reset: Clear the collected samples after exporting them
+        
+    Returns:
+        Collapsed stacks as plain text, or the flamegraph tree as JSON
+    """
+    require_admin(request)
+    
+    if format == "collapsed":
+        response = PlainTextResponse(sampling_profiler.collapsed())
+    elif format == "flamegraph":
+        response = JSONResponse(content={
+            "profiler": sampling_profiler.stats(),
+            "root": sampling_profiler.flamegraph()
+        })
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'collapsed' or 'flamegraph'"
+        )
+    
+    if reset:
+        sampling_profiler.reset()
+    return response
+
+
+def get_entity_index() -> EntityIndex:
+    """
+    Return the entity index, or fail if it is disabled.
+    
+    Raises:
+        HTTPException: 503 if no index is configured
+    """
+    if entity_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Entity index is disabled (set ENTITY_INDEX_PATH)"
+        )
+    return entity_index
+
+
+@app.get("/search")
+async def search_entities(request: Request, q: str, mode: str = "match", field: Optional[str] = None,
+                          limit: int = 20, offset: int = 0):
+    """
+    Find processed documents that mention an entity, without re-extracting them.
+    
+    The index spans every tenant's documents, so like /export this requires
+    the admin token.
+    
+    Args:
+        q: Entity to look for, e.g. 'Acme Corp' or '9876543210'
+        mode: 'match' (case-insensitive phrase), 'prefix' (last word may be
+            incomplete, e.g. 'acme tech') or 'exact' (the whole extracted value)
+        field: Only search one output field, e.g. 'organization' or 'phone_numbers'
+        limit: Maximum number of documents returned (at most 100)
+        offset: Number of matching documents to skip, for paging
+        
+    Returns:
+        JSON with the matching documents (hash, file type, filename) and the
+        entities that matched in each
+    """
+    require_admin(request)
+    index = get_entity_index()
+    try:
+        return await run_in_threadpool(index.search, q, mode, field, min(limit, 100), offset)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@app.post("/admin/index/compact")
+async def compact_entity_index(request: Request, vacuum: bool = False):
+    """
+    Compact the entity index (merge FTS segments, truncate the WAL).
+    
+    Args:
+        vacuum: Also rebuild the database file to release free space
+        
+    Returns:
+        JSON with the index size before and after compaction
+    """
+    require_admin(request)
+    index = get_entity_index()
+    return await run_in_threadpool(index.compact, vacuum)
+
+
+@app.get("/export")
+async def export_entities(request: Request, format: str = "parquet", fields: Optional[str] = None,
+                          file_type: Optional[str] = None, since: Optional[str] = None,
+                          batch_size: int = DEFAULT_EXPORT_BATCH_SIZE, compression: Optional[str] = None):
+    """
+    Export the entities of every indexed document in a columnar format (admin only).
+    
+    The export is streamed: documents are read from the entity index and
+    encoded one record batch at a time.
+    
+    Args:
+        format: 'parquet' or 'arrow' (Arrow IPC stream)
+        fields: Comma separated result fields to include (default: all)
+        file_type: Only documents of this type, e.g. 'pdf'
+        since: Only documents indexed since this Unix timestamp or ISO 8601 date/time
+        batch_size: Documents per record batch / Parquet row group (at most 10000)
+        compression: Parquet: 'zstd' (default), 'snappy', 'gzip', 'lz4',
+            'brotli' or 'none'; Arrow: 'none' (default), 'zstd' or 'lz4'
+        
+    Returns:
+        Parquet file or Arrow IPC stream with one row per document and list
+        fields stored as dictionary-encoded strings
+    """
+    require_admin(request)
+    index = get_entity_index()
+    requested_fields = parse_fields(fields)
+    if not 1 <= batch_size <= 10000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="batch_size must be between 1 and 10000"
+        )
+    
+    try:
+        batches = index.iter_documents(batch_size, file_type, parse_since(since))
+        chunks = stream_export(batches, format, requested_fields, compression)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="entities{extension}"'}
+    )
+
+
+def stage_upload(upload: UploadFile) -> Optional[SegmentHandle]:
+    """
+    Copy an uploaded file into shared memory for the worker pool.
+    
+    The upload is copied block by block from its spooled temporary file, so
+    the document is never held as one bytes object in this process; workers
+    open the segment by path (see transport.segment_path).
+    
+    Args:
+        upload: Uploaded file
+        
+    Returns:
+        Handle of the new segment (release it through process_pool.registry),
+        or None if the upload is empty or segments cannot be opened by path
+    """
+    source = upload.file
+    size = source.seek(0, os.SEEK_END)
+    source.seek(0)
+    if size == 0:
+        return None
+    handle = process_pool.registry.put_stream(source, size)
+    if segment_path(handle) is None:
+        process_pool.registry.release(handle)
+        source.seek(0)
+        return None
+    return handle
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse the comma separated 'fields' query parameter.
+    
+    Args:
+        fields: Raw parameter value, e.g. 'emails,phone_numbers'
+        
+    Returns:
+        List of field names, or None when all fields are requested
+        
+    Raises:
+        HTTPException: If an unknown field is requested
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    try:
+        DocumentExtractor.resolve_fields(requested)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return requested
+
+
+def parse_budget(max_pages: Optional[int], pages: Optional[str], time_budget: Optional[float],
+                 sample: Optional[int]) -> Optional[ExtractionBudget]:
+    """
+    Build the extraction budget from the request parameters.
+    
+    Returns:
+        ExtractionBudget, or None when the whole document is requested
+        
+    Raises:
+        HTTPException: If a budget parameter is invalid
+    """
+    try:
+        return ExtractionBudget.from_params(max_pages, pages, time_budget, sample)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def is_complete(result: Dict) -> bool:
+    """Whether a result covers the whole document (always true without a budget)."""
+    coverage = result.get("coverage")
+    return coverage is None or coverage["complete"]
+
+
+async def run_extraction(request: Request, file_content, file_extension: str,
+                         document_hash: str, fields: Optional[List[str]] = None,
+                         include_positions: bool = False, timer: Optional[StageTimer] = None,
+                         call_graph: bool = False, filename: Optional[str] = None,
+                         budget: Optional[ExtractionBudget] = None):
+    """
+    Produce an extraction result, from the cache or through the scheduler.
+    
+    Full results are cached; on a cache miss, a full result indexed by the
+    current extractor version (e.g. pre-extracted before a restart) is
+    rebuilt from the entity index. A request for a subset of fields is
+    answered from such a full result when one exists; otherwise only the
+    requested extractors run and the partial result is not cached. Requests for value
+    positions, and profiled requests, always run extraction and are not cached.
+    Profiled requests run in this process so their stages can be timed.
+    Every freshly extracted full result is queued for the entity index;
+    partial results are not indexed, like they are not cached.
+    
+    A budgeted request is answered from a cached full result only when its
+    page selection covers every page anyway (e.g. max_pages above the page
+    count); a request for some pages gets entities from those pages only.
+    Budgeted results that did not cover the whole document are neither
+    cached nor indexed.
+    
+    Args:
+        request: Incoming request (used to identify the tenant)
+        file_content: File content as bytes, or a Path to the file on disk
+        file_extension: File extension (e.g., 'pdf', 'txt')
+        document_hash: SHA-256 hex digest of the document
+        fields: Optional list of requested output fields
+        include_positions: Whether to add value positions to the result
+        timer: StageTimer when the request is being profiled
+        call_graph: Whether to capture a cProfile call graph (profiled requests only)
+        filename: Original file name, recorded in the entity index
+        budget: Optional page/time budget; adds a "coverage" entry to the result
+        
+    Returns:
+        Tuple of (result, response headers)
+    """
+    version = extractor.cache_version
+    headers = {"X-Extractor-Version": version, "X-Document-Hash": document_hash}
+    
+    bypass_cache = include_positions or timer is not None
+    page_count = None
+    if budget is not None and not bypass_cache:
+        page_count = await run_in_threadpool(count_pdf_pages, file_content) if file_extension == 'pdf' else 1
+        # A cached result covers the whole document, more than a page subset asked for
+        bypass_cache = budget.max_selected_pages(page_count) < page_count
+    result = None if bypass_cache else await run_in_threadpool(find_result, document_hash, file_extension, version)
+    if result is not None:
+        headers["X-Cache"] = "HIT"
+        if fields is not None:
+            result = {field: result[field] for field in extractor.resolve_fields(fields)}
+        if budget is not None:
+            result["coverage"] = ExtractionBudget.full_coverage(page_count)
+        return result, headers
+    
+    tenant = tenant_from_headers(request.headers, scheduler.tenant_weights, TENANT_API_KEYS)
+    cost = await run_in_threadpool(estimate_cost, file_content, file_extension, fields, budget)
+    
+    if timer is not None:
+        scheduled_at = time.perf_counter()
+        result, graph = await scheduler.run(
+            tenant, cost, run_profiled, timer, call_graph,
+            extractor.extract, file_content, file_extension, fields, include_positions, budget
+        )
+        timer.add("queue_wait", time.perf_counter() - scheduled_at - timer.stages.get("extraction", 0.0))
+        if entity_index is not None and fields is None and is_complete(result):
+            entity_index.add(document_hash, file_extension, result, filename, version)
+        result["profile"] = timer.to_dict()
+        if graph is not None:
+            result["profile"]["call_graph"] = graph
+        headers["X-Cache"] = "BYPASS"
+        return result, headers
+    
+    extract = process_pool.extract if process_pool is not None else extractor.extract
+    result = await scheduler.run(
+        tenant, cost, extract, file_content, file_extension, fields, include_positions, budget
+    )
+    complete = is_complete(result)
+    if fields is None and not include_positions and complete:
+        cached = {key: value for key, value in result.items() if key != "coverage"}
+        result_cache.put(document_hash, file_extension, version, cached)
+    if entity_index is not None and fields is None and complete:
+        entity_index.add(document_hash, file_extension, result, filename, version)
+    headers["X-Cache"] = "MISS"
+    return result, headers
+
+
+@app.api_route("/extract/{document_hash}", methods=["GET", "HEAD"])
+async def lookup_cached_result(request: Request, document_hash: str, file_type: str):
+    """
+    Look up a previously extracted result by document hash.
+    
+    Clients hash the file locally and call this before uploading, so the upload
+    can be skipped entirely on a hit. Results are served from the cache or
+    rebuilt from the entity index; only results produced by the currently
+    loaded extractor version are returned.
+    
+    Args:
+        document_hash: SHA-256 hex digest of the document bytes
+        file_type: File extension of the document (pdf or txt)
+        
+    Returns:
+        The cached result (GET) or an empty 200 response (HEAD)
+        
+    Raises:
+        HTTPException: 404 if no current result is cached
+    """
+    if extractor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Document extractor is not initialized"
+        )
+    
+    if not SHA256_PATTERN.match(document_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Document hash must be a 64 character SHA-256 hex digest"
+        )
+    
+    file_extension = file_type.lower().lstrip('.')
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {file_extension}. Supported types: pdf, txt"
+        )
+    
+    headers = {"X-Extractor-Version": extractor.cache_version}
+    result = await run_in_threadpool(find_result, document_hash, file_extension, extractor.cache_version, True)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No cached result for this document",
+            headers=headers
+        )
+    
+    headers["X-Cache"] = "HIT"
+    if request.method == "HEAD":
+        return Response(status_code=status.HTTP_200_OK, headers=headers)
+    
+    return negotiated_response(
+        request.headers.get("accept"), request.headers.get("accept-encoding"), result,
+        headers=headers
+    )
+
+
 @app.post("/extract")
-async def extract_document_info(file: UploadFile = File(...)):
+async def extract_document_info(request: Request, file: UploadFile = File(...),
+                                fields: Optional[str] = None, positions: bool = False,
+                                profile: bool = False, call_graph: bool = False,
+                                max_pages: Optional[int] = None, pages: Optional[str] = None,
+                                time_budget: Optional[float] = None, sample: Optional[int] = None):
     """
     Extract structured information from a PDF or TXT document.
     
+    Extraction work is queued per tenant (X-Tenant-ID for tenants configured
+    in TENANT_WEIGHTS, otherwise X-API-Key for keys configured in
+    TENANT_API_KEYS) and scheduled fairly
+    across tenants, cheapest job first within a tenant.
+    
+    The response is JSON, or MessagePack with Accept: application/msgpack,
+    compressed with zstd or gzip according to Accept-Encoding. The upload
+    itself may be sent with Content-Encoding: gzip or zstd.
+    
     Args:
         file: Uploaded file (PDF or TXT format)
+        fields: Optional comma separated list of output fields to extract
+        positions: Add a "positions" entry with the offset, page and line
+            of every extracted value
+        profile: Add a "profile" entry with a per-stage timing breakdown
+            (requires X-Admin-Token)
+        call_graph: With profile, also attach a cProfile call-graph summary
+        max_pages: Read at most this many PDF pages
+        pages: Only read these PDF pages, e.g. '1-10,50,200-' (1-based)
+        time_budget: Stop reading PDF pages after this many seconds
+        sample: Triage mode: read the first and last N pages plus N evenly
+            spaced pages between them
+        
+        With any budget parameter the result gets a "coverage" entry listing
+        the pages read and whether the document was covered completely.
         
     Returns:
         JSON response with extracted entities:
@@ -124,15 +769,29 @@ async def extract_document_info(file: UploadFile = File(...)):
     
     file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ""
     
-    if file_extension not in ['pdf', 'txt']:
+    if file_extension not in SUPPORTED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Unsupported file type: {file_extension}. Supported types: pdf, txt"
         )
     
+    # Fail before extracting anything if the response format is not acceptable
+    choose_media_type(request.headers.get("accept"))
+    
+    timer = None
+    if profile:
+        require_admin(request)
+        timer = StageTimer()
+    
+    staged = None
     try:
-        # Read file content
-        file_content = await file.read()
+        # Read file content; for the worker pool it goes straight into shared memory
+        start = time.perf_counter()
+        if process_pool is not None and timer is None:
+            staged = await run_in_threadpool(stage_upload, file)
+        file_content = segment_path(staged) if staged is not None else await file.read()
+        if timer is not None:
+            timer.add("read_upload", time.perf_counter() - start)
         
         if not file_content:
             raise HTTPException(
@@ -140,13 +799,30 @@ async def extract_document_info(file: UploadFile = File(...)):
                 detail="Uploaded file is empty"
             )
         
-        # Extract information from document
-        result = extractor.extract(file_content, file_extension)
+        requested_fields = parse_fields(fields)
+        budget = parse_budget(max_pages, pages, time_budget, sample)
+        
+        # Serve a cached result when this exact document was already processed
+        start = time.perf_counter()
+        if staged is not None:
+            document_hash = await run_in_threadpool(extractor.compute_file_hash, file_content)
+        else:
+            document_hash = extractor.compute_document_hash(file_content)
+        if timer is not None:
+            timer.add("hash", time.perf_counter() - start)
         
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=result
+        result, headers = await run_extraction(
+            request, file_content, file_extension, document_hash, requested_fields, positions,
+            timer=timer, call_graph=call_graph, filename=file.filename, budget=budget
         )
+        
+        return negotiated_response(
+            request.headers.get("accept"), request.headers.get("accept-encoding"), result,
+            headers=headers
+        )
+    
+    except HTTPException:
+        raise
     
     except ValueError as e:
         # Handle validation errors (empty files, unsupported formats, etc.)
@@ -168,8 +844,198 @@ async def extract_document_info(file: UploadFile = File(...)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(e)}"
         )
+    
+    finally:
+        if staged is not None:
+            process_pool.registry.release(staged)
+
+
+
+class UploadCreateRequest(BaseModel):
+    """Body of POST /uploads."""
+    filename: str
+    size: int
+    sha256: Optional[str] = None
 
 
+@app.post("/uploads", status_code=status.HTTP_201_CREATED)
+async def create_upload(body: UploadCreateRequest):
+    """
+    Start a resumable upload session.
+    
+    The client then PUTs byte ranges of the file, in any order, each with a
+    Content-Range header and the chunk's SHA-256 in X-Chunk-SHA256. If the
+    connection drops, GET /uploads/{id} reports what has been received so
+    only the missing ranges need to be sent again.
+    
+    Args:
+        body: Filename, total size in bytes and optional SHA-256 of the whole file
+        
+    Returns:
+        JSON description of the new session, including its upload_id
+    """
+    file_extension = body.filename.split('.')[-1].lower() if '.' in body.filename else ""
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type: {file_extension}. Supported types: pdf, txt"
+        )
+    if body.sha256 is not None and not SHA256_PATTERN.match(body.sha256):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sha256 must be a 64 character SHA-256 hex digest"
+        )
+    
+    try:
+        session = upload_manager.create(body.filename, body.size, body.sha256)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return session.to_dict(upload_manager.ttl_seconds)
+
+
+@app.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, request: Request):
+    """
+    Upload one byte range of a file.
+    
+    Headers:
+        Content-Range: bytes start-end/total (end inclusive)
+        X-Chunk-SHA256: SHA-256 hex digest of the chunk body
+        
+    Returns:
+        JSON session status with the updated offset
+    """
+    try:
+        session = await upload_manager.write_chunk(
+            upload_id,
+            request.headers.get("content-range"),
+            request.headers.get("x-chunk-sha256"),
+            request.stream()
+        )
+    except UploadNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return session.to_dict(upload_manager.ttl_seconds)
+
+
+@app.get("/uploads/{upload_id}")
+async def get_upload_status(upload_id: str):
+    """
+    Report how much of an upload has been received.
+    
+    Returns:
+        JSON session status; 'offset' is the number of contiguous bytes
+        received from the start and 'received_ranges' lists every range held
+    """
+    try:
+        session = upload_manager.get(upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    return JSONResponse(
+        content=session.to_dict(upload_manager.ttl_seconds),
+        headers={"Upload-Offset": str(session.offset)}
+    )
+
+
+@app.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(upload_id: str):
+    """Abort an upload and delete its spooled data."""
+    upload_manager.discard(upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, request: Request, fields: Optional[str] = None,
+                          positions: bool = False, max_pages: Optional[int] = None,
+                          pages: Optional[str] = None, time_budget: Optional[float] = None,
+                          sample: Optional[int] = None):
+    """
+    Verify a completed upload and extract information from it.
+    
+    The spooled file is hashed from disk and, if a SHA-256 was declared when
+    the session was created, checked against it. Extraction reads the file
+    from disk. The session is removed once a result has been produced.
+    
+    Args:
+        upload_id: Session identifier
+        fields: Optional comma separated list of output fields to extract
+        positions: Add value positions to the result, as for POST /extract
+        max_pages, pages, time_budget, sample: Extraction budget, as for POST /extract
+        
+    Returns:
+        JSON response with extracted entities, as for POST /extract
+    """
+    requested_fields = parse_fields(fields)
+    budget = parse_budget(max_pages, pages, time_budget, sample)
+    choose_media_type(request.headers.get("accept"))
+    
+    if extractor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Document extractor is not initialized"
+        )
+    
+    try:
+        session = await run_in_threadpool(upload_manager.begin_finalize, upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        document_hash = await run_in_threadpool(extractor.compute_file_hash, session.spool_path)
+        if session.sha256 and document_hash != session.sha256:
+            raise ValueError("Uploaded file does not match the declared sha256")
+        
+        result, headers = await run_extraction(
+            request, session.spool_path, session.file_extension, document_hash,
+            requested_fields, positions, filename=session.filename, budget=budget
+        )
+        
+        upload_manager.discard(upload_id)
+        return negotiated_response(
+            request.headers.get("accept"), request.headers.get("accept-encoding"), result,
+            headers=headers
+        )
+    
+    except ValueError as e:
+        # The assembled file is unusable; drop it so the client starts over
+        upload_manager.discard(upload_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        # Keep the data so finalize can be retried
+        session.finalizing = False
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Processing error: {str(e)}"
+        )
+
 # Sample request and response examples (for documentation):
 """
 Sample Request (using curl):
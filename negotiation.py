@@ -0,0 +1,380 @@
+"""
+Content Negotiation Module
+
+This module handles:
+- Choosing the response format from the Accept header (JSON or MessagePack)
+- Fast JSON encoding with orjson when it is installed
+- Response compression (zstd or gzip) chosen from Accept-Encoding
+- Streaming decompression of request bodies sent with Content-Encoding
+
+orjson, msgpack and zstandard are optional. Without them the API falls back
+to the standard library JSON encoder and gzip, and MessagePack or zstd are
+simply not offered during negotiation.
+"""
+
+import asyncio
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Largest piece of a zstd request body decoded at a time
+ZSTD_DECODE_BYTES = 1024 * 1024
+
+
+def parse_quality_list(header: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Parse an Accept or Accept-Encoding header into (value, q) pairs.
+
+    Args:
+        header: Raw header value, e.g. 'application/msgpack, application/json;q=0.5'
+
+    Returns:
+        List of (lowercase value, quality), in header order
+    """
+    if not header:
+        return []
+    items = []
+    for part in header.split(','):
+        value, *params = part.split(';')
+        value = value.strip().lower()
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        items.append((value, quality))
+    return items
+
+
+def available_media_types() -> List[str]:
+    """Response media types this process can produce, preferred first."""
+    return [JSON_MEDIA_TYPE] + (list(MSGPACK_MEDIA_TYPES) if msgpack is not None else [])
+
+
+def available_encodings() -> List[str]:
+    """Response content codings this process can produce, preferred first."""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def choose_media_type(accept: Optional[str]) -> str:
+    """
+    Pick the response media type for an Accept header.
+
+    Explicit types beat wildcards; among equal qualities JSON wins. A missing
+    header means JSON.
+
+    Args:
+        accept: Raw Accept header
+
+    Returns:
+        The chosen media type
+
+    Raises:
+        HTTPException: 406 if the client accepts none of the available types
+    """
+    items = parse_quality_list(accept)
+    if not items:
+        return JSON_MEDIA_TYPE
+
+    best, best_quality = None, 0.0
+    for media_type in available_media_types():
+        quality = None
+        for value, q in items:
+            if value == media_type:
+                quality = q
+                break
+        if quality is None:
+            for value, q in items:
+                if value in ("*/*", "application/*"):
+                    quality = q
+                    break
+        if quality is not None and quality > best_quality:
+            best, best_quality = media_type, quality
+
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Supported response types: {', '.join(available_media_types())}"
+        )
+    return best
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header
+
+    Returns:
+        'zstd', 'gzip' or None for an uncompressed body
+    """
+    items = dict(parse_quality_list(accept_encoding))
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = items.get(encoding, items.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encode_body(content, media_type: str) -> bytes:
+    """
+    Serialize a result.
+
+    JSON output matches JSONResponse (UTF-8, compact separators); orjson is
+    used when available.
+
+    Args:
+        content: JSON-compatible value
+        media_type: JSON or a MessagePack media type
+
+    Returns:
+        Encoded body
+    """
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return msgpack.packb(content, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a body with a content coding.
+
+    Args:
+        body: Encoded body
+        encoding: 'zstd' or 'gzip'
+
+    Returns:
+        Compressed body
+    """
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def negotiated_response(accept: Optional[str], accept_encoding: Optional[str], content,
+                        status_code: int = status.HTTP_200_OK,
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build a response in the format and coding the client asked for.
+
+    Args:
+        accept: Request Accept header
+        accept_encoding: Request Accept-Encoding header
+        content: JSON-compatible result
+        status_code: HTTP status
+        headers: Extra response headers
+
+    Returns:
+        Response with Content-Type, Content-Encoding and Vary set
+
+    Raises:
+        HTTPException: 406 if no acceptable media type is available
+    """
+    media_type = choose_media_type(accept)
+    body = encode_body(content, media_type)
+
+    response_headers = dict(headers or {})
+    response_headers["Vary"] = "Accept, Accept-Encoding"
+    encoding = choose_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is not None:
+        body = compress_body(body, encoding)
+        response_headers["Content-Encoding"] = encoding
+
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=response_headers)
+
+
+class _Decompressor:
+    """Incremental gzip/deflate decoder for one request body."""
+
+    def __init__(self, encoding: str):
+        self._decoder = zlib.decompressobj(31 if encoding == "gzip" else zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        """Decode a chunk; output stops just past limit so a bomb is never fully inflated."""
+        output = self._decoder.decompress(data, limit + 1)
+        chunks = [output]
+        produced = len(output)
+        # Input left over once the output is full stays in unconsumed_tail
+        while self._decoder.unconsumed_tail and produced <= limit:
+            output = self._decoder.decompress(self._decoder.unconsumed_tail, limit + 1 - produced)
+            chunks.append(output)
+            produced += len(output)
+        return b"".join(chunks)
+
+    def flush(self) -> bytes:
+        """Return the remaining output; only call it once decompress() stayed within the limit."""
+        return self._decoder.flush()
+
+
+class _ReceiveReader:
+    """
+    Blocking file-like view of an ASGI request body.
+
+    zstandard's decompressobj has no output limit, so zstd bodies are decoded
+    with a stream_reader pulling from this object in a worker thread; each
+    read() fetches the next body message from the event loop.
+    """
+
+    def __init__(self, receive, loop: asyncio.AbstractEventLoop):
+        self._receive = receive
+        self._loop = loop
+        self._more_body = True
+        self.disconnect: Optional[Dict] = None
+
+    def read(self, size: int = -1) -> bytes:
+        while self._more_body:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] != "http.request":
+                self.disconnect = message
+                self._more_body = False
+                break
+            self._more_body = message.get("more_body", False)
+            body = message.get("body", b"")
+            if body:
+                return body
+        return b""
+
+
+class DecompressionMiddleware:
+    """
+    ASGI middleware that decodes request bodies sent with Content-Encoding.
+
+    Each received chunk is decompressed as it arrives, so the compressed body
+    is never buffered as a whole; the endpoint sees a plain body without
+    Content-Encoding or Content-Length headers. The decompressed size is
+    capped to protect against decompression bombs, and no decoder produces
+    more than one byte past the cap (zstd bodies are read through a bounded
+    stream_reader rather than decompressobj, which has no output limit).
+    """
+
+    def __init__(self, app, max_size: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            app: ASGI application to wrap
+            max_size: Maximum decompressed body size in bytes
+        """
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"content-encoding":
+                encoding = value.decode("latin-1").strip().lower()
+                break
+        if encoding in (None, "", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        supported = ["gzip", "deflate"] + (["zstd"] if zstandard is not None else [])
+        if encoding not in supported:
+            response = Response(
+                content=f"Unsupported Content-Encoding: {encoding}. Supported: {', '.join(supported)}",
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                headers={"Accept-Encoding": ", ".join(supported)}
+            )
+            await response(scope, receive, send)
+            return
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        max_size = self.max_size
+        total = 0
+
+        def check_size(body: bytes) -> None:
+            nonlocal total
+            total += len(body)
+            if total > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Decompressed request body exceeds {max_size} bytes"
+                )
+
+        def malformed(error: Exception) -> HTTPException:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Malformed {encoding} request body: {str(error)}"
+            )
+
+        if encoding == "zstd":
+            source = _ReceiveReader(receive, asyncio.get_running_loop())
+            reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+            finished = False
+
+            async def decompressing_receive():
+                nonlocal finished
+                if finished:
+                    return await receive()
+                try:
+                    # At most one byte past the limit is ever inflated
+                    body = await asyncio.to_thread(reader.read, min(ZSTD_DECODE_BYTES, max_size - total + 1))
+                except zstandard.ZstdError as e:
+                    raise malformed(e)
+                if source.disconnect is not None:
+                    finished = True
+                    return source.disconnect
+                check_size(body)
+                finished = not body
+                return {"type": "http.request", "body": body, "more_body": not finished}
+        else:
+            decompressor = _Decompressor(encoding)
+
+            async def decompressing_receive():
+                message = await receive()
+                if message["type"] != "http.request":
+                    return message
+                try:
+                    body = decompressor.decompress(message.get("body", b""), max_size - total)
+                    # flush() inflates whatever input is left without a limit
+                    if not message.get("more_body", False) and total + len(body) <= max_size:
+                        body += decompressor.flush()
+                except zlib.error as e:
+                    raise malformed(e)
+                check_size(body)
+                return {**message, "body": body}
+
+        await self.app(scope, decompressing_receive, send)
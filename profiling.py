@@ -0,0 +1,307 @@
+"""
+Profiling Module
+
+This module handles:
+- Per-request stage timing (opt-in, via ?profile=1 on /extract)
+- Optional cProfile call-graph capture of a single request
+- An always-on statistical sampling profiler that aggregates hot stacks
+  across requests and exports them as collapsed stacks or flamegraph JSON
+
+Stage timing is driven by a context variable: stage() is a cheap no-op
+unless a StageTimer is active for the current request, so the extractor
+can stay instrumented permanently.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+_current_timer: contextvars.ContextVar = contextvars.ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulates wall-clock time per named stage of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a stage."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict:
+        """
+        Return the timing breakdown in milliseconds.
+
+        Returns:
+            Dictionary with the total request time and per-stage times
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+        }
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block as a stage of the current request, if it is being profiled.
+
+    Args:
+        name: Stage name
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def run_profiled(timer: StageTimer, call_graph: bool, func: Callable, *args,
+                 **kwargs) -> Tuple[Any, Optional[List[Dict]]]:
+    """
+    Run a blocking function with stage timing (and optionally cProfile) enabled.
+
+    Meant to be executed in the worker thread, so the timer and the profiler
+    are attached to the thread that actually does the work.
+
+    Args:
+        timer: StageTimer of the request
+        call_graph: Whether to capture a cProfile call graph
+        func: Function to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Tuple of (func's return value, call-graph summary or None)
+    """
+    token = _current_timer.set(timer)
+    profiler = cProfile.Profile() if call_graph else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with timer.stage("extraction"):
+                result = func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    finally:
+        _current_timer.reset(token)
+
+    return result, summarize_profile(profiler) if profiler is not None else None
+
+
+def summarize_profile(profiler: cProfile.Profile, limit: int = 40) -> List[Dict]:
+    """
+    Summarize a cProfile run as the top functions by cumulative time.
+
+    Args:
+        profiler: Finished profiler
+        limit: Maximum number of functions to report
+
+    Returns:
+        List of {function, calls, total_ms, cumulative_ms, callers}
+    """
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, callers) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}:{name}",
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+            "callers": sorted(f"{os.path.basename(f)}:{l}:{n}" for f, l, n in callers)[:5],
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def is_authorized(token: Optional[str], expected: Optional[str]) -> bool:
+    """
+    Check an admin token in constant time.
+
+    Args:
+        token: Token supplied with the request
+        expected: Configured admin token; when unset, nothing is authorized
+
+    Returns:
+        True if the token matches
+    """
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+# Leaf frames of threads that are parked rather than working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("base_events.py", "_run_once"),
+}
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that periodically samples every thread's stack.
+
+    A daemon thread wakes every interval seconds and records the Python
+    stack of each other thread as a collapsed 'outer;...;inner' string.
+    Nothing is installed in the profiled threads, so overhead is one stack
+    walk per thread per interval. Parked threads are not counted.
+    """
+
+    def __init__(self, interval: float = 0.02, max_depth: int = 64, max_stacks: int = 50000):
+        """
+        Initialize the profiler (call start() to begin sampling).
+
+        Args:
+            interval: Seconds between samples
+            max_depth: Deepest stack recorded (outermost frames are dropped)
+            max_stacks: Maximum number of distinct stacks kept
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.dropped = 0
+        self.started_at: Optional[float] = None
+
+    def start(self) -> None:
+        """Start the sampling thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampling thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._record(frame)
+
+    def _record(self, frame) -> None:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            return
+
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            code = frame.f_code
+            labels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        labels.reverse()
+        stack = ";".join(labels)
+
+        with self._lock:
+            self.samples += 1
+            if stack in self._counts or len(self._counts) < self.max_stacks:
+                self._counts[stack] += 1
+            else:
+                self.dropped += 1
+
+    def reset(self) -> None:
+        """Discard all collected samples."""
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+            self.dropped = 0
+            self.started_at = time.time()
+
+    def collapsed(self) -> str:
+        """
+        Export samples in collapsed-stack format ('frame;frame;frame count' per line).
+
+        This is the input format of flamegraph.pl, speedscope and inferno.
+
+        Returns:
+            Collapsed stacks, hottest first
+        """
+        with self._lock:
+            items = self._counts.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def flamegraph(self) -> Dict:
+        """
+        Export samples as a nested flamegraph tree ({name, value, children}),
+        as consumed by d3-flame-graph.
+
+        Returns:
+            Root node of the tree
+        """
+        with self._lock:
+            items = list(self._counts.items())
+
+        root = {"name": "all", "value": 0, "children": {}}
+        for stack, count in items:
+            root["value"] += count
+            node = root
+            for label in stack.split(";"):
+                child = node["children"].get(label)
+                if child is None:
+                    child = {"name": label, "value": 0, "children": {}}
+                    node["children"][label] = child
+                child["value"] += count
+                node = child
+
+        def to_lists(node: Dict) -> Dict:
+            node["children"] = sorted(
+                (to_lists(child) for child in node["children"].values()),
+                key=lambda child: child["value"], reverse=True
+            )
+            return node
+
+        return to_lists(root)
+
+    def stats(self) -> Dict:
+        """
+        Return profiler statistics.
+
+        Returns:
+            Dictionary with the sampling interval and sample counts
+        """
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "interval_seconds": self.interval,
+                "samples": self.samples,
+                "distinct_stacks": len(self._counts),
+                "dropped_samples": self.dropped,
+                "since": self.started_at,
+            }
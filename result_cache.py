@@ -0,0 +1,210 @@
+"""
+Result Cache Module
+
+This module handles:
+- In-memory caching of extraction results keyed by document hash
+- Version tagging so results from an older extractor or model are never served
+- A separate tier for results pre-extracted in the background, so a folder
+  scan never evicts the results users are actually requesting
+- Falling back to persistent storage (the entity index) on a miss
+- Hit/miss accounting for the /metrics endpoint (pre-upload lookups by hash
+  are counted separately, so a lookup miss followed by the upload of the same
+  cold document counts as one miss, not two)
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of structured extraction results.
+
+    Entries are keyed by (document SHA-256, file extension, extractor version).
+    Because the version is part of the key, a result produced by a different
+    extractor or model can never be returned as a hit; such entries simply age
+    out of the LRU, or are dropped when they are looked up.
+
+    Background results go into their own LRU tier and only move into the
+    main tier when a request hits them.
+    """
+
+    def __init__(self, max_entries: int = 256, background_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of results kept before evicting the
+                least recently used entry
+            background_entries: Maximum number of background results kept
+                in their own tier
+        """
+        self.max_entries = max_entries
+        self.background_entries = background_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]" = OrderedDict()
+        self._background: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_hits = 0
+        self.lookup_misses = 0
+        self.evictions = 0
+        self.stale = 0
+        self.loaded = 0
+
+    @staticmethod
+    def _make_key(document_hash: str, file_extension: str) -> Tuple[str, str]:
+        """Build the lookup key for a document."""
+        return document_hash.lower(), file_extension.lower().lstrip('.')
+
+    def get(self, document_hash: str, file_extension: str, version: str,
+            lookup: bool = False, loader: Optional[Callable[[], Optional[Dict]]] = None) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document bytes
+            file_extension: File extension the document was extracted as
+            version: Current extractor version; entries with any other
+                version are treated as misses and discarded
+            lookup: The request is a pre-upload lookup by hash rather than an
+                extraction request (counted as lookup_hits / lookup_misses)
+            loader: Called on a miss to fetch a result of this version from
+                persistent storage (e.g. the entity index); a loaded result
+                is cached and counted as a hit
+
+        Returns:
+            A shallow copy of the cached result, or None on a miss
+        """
+        key = self._make_key(document_hash, file_extension)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._background.pop(key, None)
+                if entry is not None and entry[0] == version:
+                    # Requested now, so it competes with the foreground entries
+                    self._insert(self._entries, self.max_entries, key, entry)
+            elif entry[0] != version:
+                del self._entries[key]
+            if entry is not None and entry[0] != version:
+                # Produced by another extractor/model version: never serve it
+                self.stale += 1
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count(True, lookup)
+                return dict(entry[1])
+            if loader is None:
+                self._count(False, lookup)
+                return None
+
+        # Not cached: read persistent storage without holding the lock
+        result = loader()
+        with self._lock:
+            self._count(result is not None, lookup)
+            if result is None:
+                return None
+            self.loaded += 1
+            self._insert(self._entries, self.max_entries, key, (version, dict(result)))
+        return dict(result)
+
+    def _count(self, hit: bool, lookup: bool) -> None:
+        """Count a hit or miss of either kind (lock must be held)."""
+        if lookup:
+            if hit:
+                self.lookup_hits += 1
+            else:
+                self.lookup_misses += 1
+        elif hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def contains(self, document_hash: str, file_extension: str, version: str) -> bool:
+        """
+        Check for a current result without counting a lookup or refreshing its LRU position.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document bytes
+            file_extension: File extension the document was extracted as
+            version: Current extractor version
+
+        Returns:
+            True if a result produced by this version is cached
+        """
+        key = self._make_key(document_hash, file_extension)
+        with self._lock:
+            entry = self._entries.get(key) or self._background.get(key)
+            return entry is not None and entry[0] == version
+
+    def put(self, document_hash: str, file_extension: str, version: str, result: Dict,
+            background: bool = False) -> None:
+        """
+        Store a result in the cache.
+
+        Args:
+            document_hash: SHA-256 hex digest of the document bytes
+            file_extension: File extension the document was extracted as
+            version: Extractor version that produced the result
+            result: Structured extraction result
+            background: The result was pre-extracted rather than requested;
+                it goes into the background tier (or replaces a main-tier entry
+                without promoting it) and evicts only background entries
+        """
+        key = self._make_key(document_hash, file_extension)
+        entry = (version, dict(result))
+        with self._lock:
+            if background and key in self._entries:
+                # Refresh the value without promoting it
+                self._entries[key] = entry
+            elif background:
+                self._insert(self._background, self.background_entries, key, entry)
+            else:
+                self._background.pop(key, None)
+                self._insert(self._entries, self.max_entries, key, entry)
+
+    def _insert(self, entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]", max_entries: int,
+                key: Tuple[str, str], entry: Tuple[str, Dict]) -> None:
+        """Insert entry as most recently used in one tier (lock must be held)."""
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._background.clear()
+
+    def stats(self) -> Dict:
+        """
+        Return cache statistics.
+
+        The hit ratio is per document: hits from either path over hits plus
+        extraction misses. A lookup miss is not counted against it because
+        the client uploads the document next, which records the miss.
+
+        Returns:
+            Dictionary with hit/miss counters, the hit ratio and the current size
+        """
+        with self._lock:
+            hits = self.hits + self.lookup_hits
+            requests = hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "lookup_hits": self.lookup_hits,
+                "lookup_misses": self.lookup_misses,
+                "hit_ratio": round(hits / requests, 4) if requests else 0.0,
+                "stale_discarded": self.stale,
+                "loaded": self.loaded,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "background_entries": len(self._background),
+                "max_background_entries": self.background_entries,
+            }
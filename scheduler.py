@@ -0,0 +1,455 @@
+"""
+Extraction Scheduling Module
+
+This module handles:
+- Estimating the cost of an extraction request before it is queued
+- Weighted fair queuing of extraction work across tenants
+- Shortest-job-first ordering within a tenant, with a starvation bound
+- Per-tenant queue wait time metrics
+
+Scheduling policy:
+    Each tenant has a virtual time that advances by cost / weight whenever one
+    of its jobs is dispatched. The backlogged tenant with the smallest virtual
+    time goes next (start-time fair queuing), so a tenant submitting one huge
+    PDF cannot hold back tenants submitting small files. Within a tenant the
+    cheapest queued job runs first. Any job that has waited longer than the
+    starvation bound is dispatched ahead of everything else, oldest first.
+
+Tenants:
+    X-Tenant-ID is only honoured for tenants configured in TENANT_WEIGHTS,
+    and X-API-Key only for keys configured in TENANT_API_KEYS (which map
+    each key to its tenant); every other request falls into the shared
+    'anonymous' tenant, so rotating header values never buys a fresh
+    virtual time. State for tenants that are not configured
+    is dropped as soon as they have nothing queued or running, and their
+    numbers are folded into aggregate metrics, so the number of tracked
+    tenants is bounded by the configuration plus the tenants currently busy.
+"""
+
+import asyncio
+import itertools
+import heapq
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+from fastapi.concurrency import run_in_threadpool
+
+from extraction_budget import ExtractionBudget
+from extractor import NER_FIELDS, RESULT_FIELDS
+
+
+# Cost model, in rough units of "seconds of work". Only the relative sizes matter.
+BASE_COST = 0.05
+COST_PER_MEGABYTE = 0.02
+COST_PER_PDF_PAGE = 0.01
+NER_COST = 0.3
+PATTERN_FIELD_COST = 0.01
+
+DEFAULT_TENANT = "anonymous"
+
+
+def count_pdf_pages(file_content: Union[bytes, Path]) -> int:
+    """
+    Read the page count of a PDF without extracting any text.
+
+    Only the document trailer and page tree are parsed, which is cheap even
+    for very large files.
+
+    Args:
+        file_content: PDF file content as bytes, or a Path to a PDF on disk
+
+    Returns:
+        Number of pages, or 0 if the PDF cannot be opened
+    """
+    try:
+        if isinstance(file_content, Path):
+            doc = fitz.open(str(file_content), filetype="pdf")
+        else:
+            doc = fitz.open(stream=file_content, filetype="pdf")
+    except Exception:
+        return 0
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def estimate_cost(file_content: Union[bytes, Path], file_extension: str,
+                  fields: Optional[List[str]] = None, budget: Optional[ExtractionBudget] = None) -> float:
+    """
+    Estimate the relative cost of extracting a document.
+
+    Args:
+        file_content: File content as bytes, or a Path to the file on disk
+        file_extension: File extension (e.g., 'pdf', 'txt')
+        fields: Requested output fields, or None for all fields
+        budget: Optional page/time budget; only the selected pages are counted
+
+    Returns:
+        Estimated cost (larger means slower)
+    """
+    if isinstance(file_content, Path):
+        size = file_content.stat().st_size
+    else:
+        size = len(file_content)
+
+    cost = BASE_COST + COST_PER_MEGABYTE * size / (1024 * 1024)
+
+    if file_extension.lower().lstrip('.') == 'pdf':
+        pages = count_pdf_pages(file_content)
+        if budget is not None:
+            pages = budget.max_selected_pages(pages)
+            if budget.time_budget is not None:
+                # Page cost is in seconds, and the page walk stops at the time budget
+                pages = min(pages, budget.time_budget / COST_PER_PDF_PAGE)
+        cost += COST_PER_PDF_PAGE * pages
+
+    requested = RESULT_FIELDS if fields is None else fields
+    if any(field in requested for field in NER_FIELDS):
+        cost += NER_COST
+    cost += PATTERN_FIELD_COST * sum(1 for field in requested if field not in NER_FIELDS)
+
+    return cost
+
+
+def tenant_from_headers(headers, configured_tenants: Iterable[str] = (),
+                        api_keys: Optional[Dict[str, str]] = None) -> str:
+    """
+    Identify the tenant a request belongs to.
+
+    The X-Tenant-ID header is used when it names a configured tenant, and
+    the X-API-Key header when it is a configured key. Any other value is
+    ignored, so clients cannot create tenants at will.
+
+    Args:
+        headers: Request headers
+        configured_tenants: Tenants that may be selected with X-Tenant-ID
+        api_keys: Configured API keys and the tenant each one belongs to
+
+    Returns:
+        Tenant identifier
+    """
+    tenant = (headers.get("x-tenant-id") or "").strip()
+    if tenant and tenant in configured_tenants:
+        return tenant
+
+    api_key = (headers.get("x-api-key") or "").strip()
+    if api_key and api_keys and api_key in api_keys:
+        return api_keys[api_key]
+
+    return DEFAULT_TENANT
+
+
+def parse_tenant_weights(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse a tenant weight specification such as 'teamA=2,teamB=0.5'.
+
+    Args:
+        spec: Comma separated tenant=weight pairs
+
+    Returns:
+        Dictionary of tenant weights
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    weights = {}
+    if not spec:
+        return weights
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        tenant, _, weight = item.partition('=')
+        value = float(weight)
+        if value <= 0:
+            raise ValueError(f"Tenant weight must be positive: {item}")
+        weights[tenant.strip()] = value
+    return weights
+
+
+def parse_tenant_api_keys(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Parse an API key specification such as 'teamA=key1,teamA=key2,teamB=key3'.
+
+    Args:
+        spec: Comma separated tenant=key pairs (a tenant may have several keys)
+
+    Returns:
+        Dictionary mapping each key to its tenant
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    api_keys = {}
+    if not spec:
+        return api_keys
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        tenant, _, api_key = item.partition('=')
+        if not tenant.strip() or not api_key.strip():
+            raise ValueError(f"Expected tenant=key: {item}")
+        api_keys[api_key.strip()] = tenant.strip()
+    return api_keys
+
+
+class _Job:
+    """A queued unit of extraction work."""
+
+    __slots__ = ("tenant", "cost", "seq", "enqueued_at", "granted", "cancelled")
+
+    def __init__(self, tenant: str, cost: float, seq: int, loop: asyncio.AbstractEventLoop):
+        self.tenant = tenant
+        self.cost = cost
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted: asyncio.Future = loop.create_future()
+        self.cancelled = False
+
+
+class _TenantState:
+    """Queue and accounting for one tenant."""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.virtual_time = 0.0
+        # Shortest-job-first order: (cost, seq, job)
+        self.by_cost: List[Tuple[float, int, _Job]] = []
+        # Arrival order, for the starvation bound
+        self.by_age: Deque[_Job] = deque()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+
+    def oldest(self) -> Optional[_Job]:
+        """Oldest job still waiting, dropping dispatched/cancelled entries."""
+        while self.by_age and (self.by_age[0].granted.done() or self.by_age[0].cancelled):
+            self.by_age.popleft()
+        return self.by_age[0] if self.by_age else None
+
+    def shortest(self) -> Optional[_Job]:
+        """Cheapest job still waiting, dropping dispatched/cancelled entries."""
+        while self.by_cost and (self.by_cost[0][2].granted.done() or self.by_cost[0][2].cancelled):
+            heapq.heappop(self.by_cost)
+        return self.by_cost[0][2] if self.by_cost else None
+
+
+class FairScheduler:
+    """
+    Admission scheduler in front of DocumentExtractor.extract.
+
+    At most max_concurrency jobs run at once (in the thread pool); the rest
+    wait in per-tenant queues and are dispatched by the policy described in
+    the module docstring. All queue state is only touched from the event loop.
+    Tenants without an entry in tenant_weights are tracked only while they
+    have jobs queued or running.
+    """
+
+    def __init__(self, max_concurrency: int = 2, tenant_weights: Optional[Dict[str, float]] = None,
+                 starvation_seconds: float = 30.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of extractions running at once
+            tenant_weights: Relative share of each tenant (default weight 1.0)
+            starvation_seconds: Wait after which a job is dispatched regardless of its cost
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.tenant_weights = tenant_weights or {}
+        self.starvation_seconds = starvation_seconds
+        self._tenants: Dict[str, _TenantState] = {}
+        self._running = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self.starvation_dispatches = 0
+        # Totals of tenants whose state was dropped while idle
+        self.retired_tenants = 0
+        self.retired_completed = 0
+        self.retired_wait_count = 0
+        self.retired_wait_total = 0.0
+        self.retired_wait_max = 0.0
+
+    def _tenant(self, tenant: str) -> _TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = _TenantState(self.tenant_weights.get(tenant, 1.0))
+            self._tenants[tenant] = state
+        return state
+
+    def _retire_if_idle(self, tenant: str) -> None:
+        """Drop an unconfigured tenant's state once it has nothing queued or running."""
+        state = self._tenants.get(tenant)
+        if state is None or state.queued or state.running or tenant in self.tenant_weights:
+            return
+        del self._tenants[tenant]
+        self.retired_tenants += 1
+        self.retired_completed += state.completed
+        self.retired_wait_count += state.wait_count
+        self.retired_wait_total += state.wait_total
+        self.retired_wait_max = max(self.retired_wait_max, state.wait_max)
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting to run."""
+        return sum(state.queued for state in self._tenants.values())
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently running."""
+        return self._running
+
+    async def wait_for_idle(self, interval: float = 0.1) -> None:
+        """
+        Wait until no job is queued and a slot is free.
+
+        Used by background work, which runs outside the scheduler but should
+        only start while user requests are not waiting.
+
+        Args:
+            interval: Seconds between checks
+        """
+        while self.queued > 0 or self._running >= self.max_concurrency:
+            await asyncio.sleep(interval)
+
+    async def run(self, tenant: str, cost: float, func: Callable, *args, **kwargs) -> Any:
+        """
+        Queue a job, wait for its turn and run it in the thread pool.
+
+        Args:
+            tenant: Tenant identifier
+            cost: Estimated cost of the job (see estimate_cost)
+            func: Blocking callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The return value of func
+        """
+        await self._acquire(tenant, cost)
+        try:
+            return await run_in_threadpool(func, *args, **kwargs)
+        finally:
+            self._release(tenant)
+
+    async def _acquire(self, tenant: str, cost: float) -> None:
+        """Enqueue a job and wait until it is dispatched."""
+        state = self._tenant(tenant)
+        job = _Job(tenant, cost, next(self._seq), asyncio.get_running_loop())
+
+        if state.queued == 0 and state.running == 0:
+            # A tenant returning from idle does not get credit for its idle time
+            state.virtual_time = max(state.virtual_time, self._virtual_time)
+        heapq.heappush(state.by_cost, (cost, job.seq, job))
+        state.by_age.append(job)
+        state.queued += 1
+        self._dispatch()
+
+        try:
+            await job.granted
+        except asyncio.CancelledError:
+            if job.granted.done() and not job.granted.cancelled():
+                # Dispatched just as the caller went away: give the slot back
+                self._release(tenant)
+            else:
+                job.cancelled = True
+                state.queued -= 1
+                self._retire_if_idle(tenant)
+            raise
+
+    def _release(self, tenant: str) -> None:
+        """Mark a running job as finished and dispatch the next one."""
+        state = self._tenants[tenant]
+        state.running -= 1
+        state.completed += 1
+        self._running -= 1
+        self._retire_if_idle(tenant)
+        self._dispatch()
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pick the next job according to the scheduling policy."""
+        now = time.monotonic()
+        candidates = []
+        starving = None
+        for state in self._tenants.values():
+            oldest = state.oldest()
+            if oldest is None:
+                continue
+            candidates.append(state)
+            if now - oldest.enqueued_at >= self.starvation_seconds:
+                if starving is None or oldest.seq < starving.seq:
+                    starving = oldest
+
+        if starving is not None:
+            self.starvation_dispatches += 1
+            return starving
+        if not candidates:
+            return None
+
+        state = min(candidates, key=lambda s: s.virtual_time)
+        return state.shortest()
+
+    def _dispatch(self) -> None:
+        """Start queued jobs while there is free capacity."""
+        while self._running < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+
+            state = self._tenants[job.tenant]
+            wait = time.monotonic() - job.enqueued_at
+            state.queued -= 1
+            state.running += 1
+            state.wait_count += 1
+            state.wait_total += wait
+            state.wait_max = max(state.wait_max, wait)
+            state.recent_waits.append(wait)
+
+            self._virtual_time = max(self._virtual_time, state.virtual_time)
+            state.virtual_time += job.cost / state.weight
+            self._running += 1
+            job.granted.set_result(None)
+
+    def stats(self) -> Dict:
+        """
+        Return scheduler statistics.
+
+        Returns:
+            Dictionary with global queue depth, per-tenant queue wait times
+            (seconds) for configured and currently busy tenants, and totals
+            for tenants dropped while idle
+        """
+        tenants = {}
+        for name, state in self._tenants.items():
+            recent = sorted(state.recent_waits)
+            tenants[name] = {
+                "weight": state.weight,
+                "queued": state.queued,
+                "running": state.running,
+                "completed": state.completed,
+                "wait_mean": round(state.wait_total / state.wait_count, 4) if state.wait_count else 0.0,
+                "wait_max": round(state.wait_max, 4),
+                "wait_p50": round(recent[int(0.50 * (len(recent) - 1))], 4) if recent else 0.0,
+                "wait_p95": round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queued": self.queued,
+            "starvation_dispatches": self.starvation_dispatches,
+            "tenants": tenants,
+            "retired_tenants": {
+                "count": self.retired_tenants,
+                "completed": self.retired_completed,
+                "wait_mean": round(self.retired_wait_total / self.retired_wait_count, 4)
+                if self.retired_wait_count else 0.0,
+                "wait_max": round(self.retired_wait_max, 4),
+            },
+        }
@@ -0,0 +1,20 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def main_module(monkeypatch):
+    """The API module, with the stub NER model, no entity index and no watched folders."""
+    monkeypatch.setitem(os.environ, "NER_MODEL", "stub")
+    monkeypatch.setitem(os.environ, "ENTITY_INDEX_PATH", "")
+    monkeypatch.setitem(os.environ, "WATCH_DIRS", "")
+    monkeypatch.setitem(os.environ, "SAMPLING_PROFILER_INTERVAL", "0")
+    main = importlib.import_module("main")
+    main.result_cache.clear()
+    return main
@@ -0,0 +1,104 @@
+"""Tests for indexing full results only and exporting them (entity_index.py, export.py)."""
+
+import pytest
+
+from entity_index import EntityIndex
+from extractor import RESULT_FIELDS
+
+VERSION = "v1"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = EntityIndex(str(tmp_path / "index.db"))
+    yield index
+    index.close()
+
+
+def full_result(**values):
+    return {field: values.get(field, []) for field in RESULT_FIELDS}
+
+
+def test_partial_results_are_rejected(index):
+    with pytest.raises(ValueError):
+        index.add("a" * 64, "pdf", {"organization": ["Acme Corp"]}, version=VERSION)
+    assert not index.contains("a" * 64, "pdf", VERSION)
+
+
+def test_reindexing_replaces_every_field(index):
+    index.add("a" * 64, "pdf", full_result(organization=["Acme Corp"], location=["Paris"]), version="v0")
+    index.add("a" * 64, "pdf", full_result(organization=["Globex"]), version=VERSION)
+
+    assert index.contains("a" * 64, "pdf", VERSION)
+    assert not index.contains("a" * 64, "pdf", "v0")
+    [[document]] = list(index.iter_documents())
+    assert document["fields"] == {"organization": ["Globex"]}
+
+
+def test_export_writes_empty_lists_for_fields_without_entities(index, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    from export import export_index
+
+    index.add("a" * 64, "pdf", full_result(organization=["Acme Corp"]), version=VERSION)
+    output = tmp_path / "entities.parquet"
+    export_index(index, str(output), fields=["organization", "location"])
+
+    assert pq.read_table(output).select(["organization", "location"]).to_pylist() == [
+        {"organization": ["Acme Corp"], "location": []}
+    ]
+
+
+def test_writer_survives_unexpected_errors(index, monkeypatch):
+    write_batch = index._write_batch
+    calls = []
+
+    def failing_once(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise TypeError("cannot serialize value")
+        return write_batch(batch)
+
+    monkeypatch.setattr(index, "_write_batch", failing_once)
+    index.flush_interval = 0
+    index.start()
+    index.add("a" * 64, "pdf", full_result(organization=["Acme Corp"]), version=VERSION)
+    index.flush()
+    index.add("b" * 64, "pdf", full_result(organization=["Globex"]), version=VERSION)
+    index.flush()
+
+    assert index.write_errors == 1
+    assert index.contains("b" * 64, "pdf", VERSION)
+
+
+def test_get_result_rebuilds_the_indexed_result(index):
+    result = full_result(organization=["Globex", "Acme Corp"], emails=["a@b.com"])
+    index.add("a" * 64, "pdf", result, version=VERSION)
+
+    assert index.get_result("a" * 64, "pdf", VERSION) == result
+    assert list(index.get_result("a" * 64, "pdf", VERSION)) == list(RESULT_FIELDS)
+    assert index.get_result("a" * 64, "pdf", "v0") is None
+    assert index.get_result("a" * 64, "txt", VERSION) is None
+
+
+def test_indexed_results_are_served_after_a_restart(main_module, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main_module, "ENTITY_INDEX_PATH", str(tmp_path / "index.db"))
+    document = b"Mail me at x@y.com"
+
+    with TestClient(main_module.app) as client:
+        response = client.post("/extract", files={"file": ("a.txt", document, "text/plain")})
+        assert response.headers["x-cache"] == "MISS"
+        document_hash = response.headers["x-document-hash"]
+        expected = response.json()
+
+    # A restart empties the cache; the index still holds the full result
+    main_module.result_cache.clear()
+    with TestClient(main_module.app) as client:
+        response = client.get(f"/extract/{document_hash}", params={"file_type": "txt"})
+        assert response.status_code == 200 and response.json() == expected
+        response = client.post("/extract", files={"file": ("a.txt", document, "text/plain")})
+        assert response.headers["x-cache"] == "HIT" and response.json() == expected
+    assert main_module.result_cache.stats()["loaded"] == 1
@@ -0,0 +1,77 @@
+"""Tests for page selection and coverage (extraction_budget.py) and budgeted /extract requests."""
+
+import fitz  # PyMuPDF
+import pytest
+from fastapi.testclient import TestClient
+
+from extraction_budget import ExtractionBudget, compress_pages, parse_page_ranges
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges("1-10, 50,200-") == [(1, 10), (50, 50), (200, None)]
+    for spec in ("", "0", "5-3", "a-b", "1,,x"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec)
+
+
+def test_select_applies_ranges_then_sampling_then_cap():
+    budget = ExtractionBudget(page_ranges=parse_page_ranges("3-5,9-"))
+    assert budget.select(10) == [2, 3, 4, 8, 9]
+
+    sampled = ExtractionBudget(sample_pages=2).select(100)
+    assert sampled[:2] == [0, 1] and sampled[-2:] == [98, 99] and len(sampled) == 6
+    # Documents too short to sample are read whole
+    assert ExtractionBudget(sample_pages=2).select(6) == list(range(6))
+
+    capped = ExtractionBudget(page_ranges=[(5, None)], sample_pages=1, max_pages=2)
+    assert capped.select(50) == [4, 27]
+
+
+def test_coverage_reports_the_pages_read():
+    budget = ExtractionBudget(page_ranges=parse_page_ranges("1-2,4"))
+    for page in budget.plan(5):
+        budget.covered(page)
+    coverage = budget.coverage()
+    assert coverage["pages"] == [[1, 2], [4, 4]]
+    assert coverage["pages_selected"] == 3 and not coverage["complete"]
+    assert coverage["stopped_by"] == "page_selection"
+
+    whole = ExtractionBudget(max_pages=10)
+    for page in whole.plan(3):
+        whole.covered(page)
+    assert whole.coverage()["complete"] and whole.coverage()["stopped_by"] is None
+    assert compress_pages([1, 2, 3, 7]) == [[1, 3], [7, 7]]
+
+
+@pytest.fixture
+def client(main_module):
+    with TestClient(main_module.app) as client:
+        yield client
+
+
+def three_page_pdf() -> bytes:
+    doc = fitz.open()
+    for name in ("one", "two", "three"):
+        doc.new_page().insert_text((72, 72), f"Contact {name}@example.com")
+    return doc.tobytes()
+
+
+def test_cached_full_result_does_not_answer_a_page_subset(client):
+    pdf = three_page_pdf()
+
+    def extract(**params):
+        return client.post("/extract", params=params, files={"file": ("doc.pdf", pdf, "application/pdf")})
+
+    response = extract()
+    assert response.headers["x-cache"] == "MISS"
+    assert len(response.json()["emails"]) == 3
+
+    response = extract(pages="2")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["emails"] == ["two@example.com"]
+    assert response.json()["coverage"]["pages"] == [[2, 2]]
+
+    # A budget that selects every page anyway is answered from the cache
+    response = extract(max_pages=10)
+    assert response.headers["x-cache"] == "HIT"
+    assert response.json()["coverage"]["complete"]
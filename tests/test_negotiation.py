@@ -0,0 +1,78 @@
+"""Tests for request body decompression limits (negotiation.DecompressionMiddleware)."""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from negotiation import DecompressionMiddleware, _Decompressor
+
+MAX_SIZE = 1024 * 1024
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(DecompressionMiddleware, max_size=MAX_SIZE)
+    return TestClient(app)
+
+
+def test_gzip_body_is_decoded_and_bombs_are_rejected(client, monkeypatch):
+    response = client.post("/echo", content=gzip.compress(b"x" * 1000), headers={"Content-Encoding": "gzip"})
+    assert response.json() == {"size": 1000}
+
+    reads = []
+    for name in ("decompress", "flush"):
+        original = getattr(_Decompressor, name)
+        monkeypatch.setattr(_Decompressor, name, _recording(original, reads))
+    # A single-message bomb: everything past the limit is left for flush()
+    bomb = gzip.compress(b"\0" * (64 * MAX_SIZE))
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+    assert sum(reads) == MAX_SIZE + 1
+
+
+def _recording(method, reads):
+    def wrapper(self, *args):
+        data = method(self, *args)
+        reads.append(len(data))
+        return data
+    return wrapper
+
+
+def test_zstd_bombs_are_rejected_without_inflating_them(client, monkeypatch):
+    zstandard = pytest.importorskip("zstandard")
+    body = zstandard.ZstdCompressor().compress(b"x" * 1000) + zstandard.ZstdCompressor().compress(b"y")
+    response = client.post("/echo", content=body, headers={"Content-Encoding": "zstd"})
+    assert response.json() == {"size": 1001}
+
+    reads = []
+    real_reader = zstandard.ZstdDecompressor.stream_reader
+    monkeypatch.setattr(zstandard.ZstdDecompressor, "stream_reader",
+                        lambda self, *args, **kwargs: _RecordingReader(real_reader(self, *args, **kwargs), reads))
+    bomb = zstandard.ZstdCompressor().compress(b"\0" * (64 * MAX_SIZE))
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": "zstd"})
+    assert response.status_code == 413
+    assert sum(reads) == MAX_SIZE + 1
+
+    response = client.post("/echo", content=b"not zstd", headers={"Content-Encoding": "zstd"})
+    assert response.status_code == 400
+
+
+class _RecordingReader:
+    """Wraps a zstd stream reader and records how many bytes it decoded."""
+
+    def __init__(self, reader, reads):
+        self._reader = reader
+        self._reads = reads
+
+    def read(self, size):
+        data = self._reader.read(size)
+        self._reads.append(len(data))
+        return data
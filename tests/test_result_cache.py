@@ -0,0 +1,56 @@
+"""Tests for the foreground and background tiers of the result cache (result_cache.py)."""
+
+from result_cache import ResultCache
+
+VERSION = "v1"
+
+
+def test_background_results_never_evict_foreground_entries():
+    cache = ResultCache(max_entries=3, background_entries=2)
+    for i in range(3):
+        cache.put(f"fg{i}", "pdf", VERSION, {"n": i})
+    for i in range(6):
+        cache.put(f"bg{i}", "pdf", VERSION, {"n": i}, background=True)
+
+    assert all(cache.contains(f"fg{i}", "pdf", VERSION) for i in range(3))
+    # The scan only evicts its own older results
+    assert [cache.contains(f"bg{i}", "pdf", VERSION) for i in range(6)] == [False] * 4 + [True] * 2
+    assert cache.stats()["entries"] == 3 and cache.stats()["background_entries"] == 2
+
+
+def test_requested_background_result_moves_to_the_main_tier():
+    cache = ResultCache(max_entries=2, background_entries=2)
+    cache.put("bg", "pdf", VERSION, {"n": 1}, background=True)
+    assert cache.get("bg", "pdf", VERSION) == {"n": 1}
+    assert cache.stats()["entries"] == 1 and cache.stats()["background_entries"] == 0
+
+    # Re-extracting in the background refreshes it without promoting it
+    cache.put("fg", "pdf", VERSION, {"n": 2})
+    cache.put("bg", "pdf", VERSION, {"n": 3}, background=True)
+    cache.put("fg2", "pdf", VERSION, {"n": 4})
+    assert not cache.contains("bg", "pdf", VERSION)
+    assert cache.get("fg", "pdf", VERSION) == {"n": 2}
+
+
+def test_stale_background_result_is_a_miss():
+    cache = ResultCache()
+    cache.put("bg", "pdf", "v0", {"n": 1}, background=True)
+    assert cache.get("bg", "pdf", VERSION) is None
+    assert cache.stats()["stale_discarded"] == 1 and cache.stats()["background_entries"] == 0
+
+
+def test_loader_fills_misses_from_persistent_storage():
+    cache = ResultCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"n": 1}
+
+    assert cache.get("doc", "pdf", VERSION, loader=loader) == {"n": 1}
+    assert cache.get("doc", "pdf", VERSION, loader=loader) == {"n": 1}
+    assert len(calls) == 1
+    assert cache.get("other", "pdf", VERSION, lookup=True, loader=lambda: None) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["lookup_misses"], stats["loaded"]) == (2, 0, 1, 1)
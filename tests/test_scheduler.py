@@ -0,0 +1,56 @@
+"""Tests for tenant identification and tenant state in the fair scheduler (scheduler.py)."""
+
+import asyncio
+import uuid
+
+from scheduler import DEFAULT_TENANT, FairScheduler, parse_tenant_api_keys, tenant_from_headers
+
+
+def test_tenant_header_only_selects_configured_tenants():
+    configured = {"teamA": 2.0}
+    assert tenant_from_headers({"x-tenant-id": "teamA"}, configured) == "teamA"
+    assert tenant_from_headers({"x-tenant-id": "made-up"}, configured) == DEFAULT_TENANT
+
+    api_keys = parse_tenant_api_keys("teamB=secret,teamB=other")
+    assert tenant_from_headers({"x-tenant-id": "made-up", "x-api-key": "secret"}, configured, api_keys) == "teamB"
+    assert tenant_from_headers({"x-api-key": "other"}, configured, api_keys) == "teamB"
+    assert tenant_from_headers({"x-api-key": "unknown"}, configured, api_keys) == DEFAULT_TENANT
+
+
+def test_rotating_api_keys_do_not_get_fresh_tenants():
+    api_keys = {"honest": "teamH"}
+    scheduler = FairScheduler(max_concurrency=1)
+    order = []
+
+    async def submit(label, headers):
+        await scheduler.run(tenant_from_headers(headers, (), api_keys), 1.0, order.append, label)
+
+    async def scenario():
+        # The first job holds the only slot while both clients queue up
+        jobs = [asyncio.create_task(submit("H", {"x-api-key": "honest"}))]
+        await asyncio.sleep(0)
+        for _ in range(20):
+            jobs.append(asyncio.create_task(submit("r", {"x-api-key": uuid.uuid4().hex})))
+            jobs.append(asyncio.create_task(submit("H", {"x-api-key": "honest"})))
+        await asyncio.gather(*jobs)
+
+    asyncio.run(scenario())
+    # Both clients are served in turn instead of the rotating one taking every slot
+    assert "".join(order[:21]).count("H") >= 10
+
+
+def test_idle_unconfigured_tenants_are_dropped():
+    scheduler = FairScheduler(max_concurrency=4, tenant_weights={"teamA": 2.0})
+
+    async def scenario():
+        await asyncio.gather(*(
+            scheduler.run(f"key-{i}", 1.0, lambda: None) for i in range(1000)
+        ))
+        await scheduler.run("teamA", 1.0, lambda: None)
+
+    asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert list(stats["tenants"]) == ["teamA"]
+    assert stats["retired_tenants"]["count"] == 1000
+    assert stats["retired_tenants"]["completed"] == 1000
+    assert stats["queued"] == 0 and stats["running"] == 0
@@ -0,0 +1,138 @@
+"""Tests for resumable upload sessions (uploads.py)."""
+
+import asyncio
+import hashlib
+import threading
+import time
+
+import pytest
+
+import uploads
+from uploads import UploadManager, UploadSession
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def body(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def put(manager: UploadManager, upload_id: str, data: bytes, start: int, total: int,
+        checksum: str = None, body_data: bytes = None):
+    end = start + len(data) - 1
+    return asyncio.run(manager.write_chunk(
+        upload_id, f"bytes {start}-{end}/{total}", checksum or sha256(data),
+        body(body_data if body_data is not None else data)
+    ))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return UploadManager(spool_dir=str(tmp_path))
+
+
+def test_add_range_merges_overlapping_and_adjacent_ranges():
+    session = UploadSession("id", "a.pdf", 100, None)
+    session.add_range(50, 60)
+    session.add_range(0, 10)
+    session.add_range(10, 20)
+    session.add_range(55, 70)
+    assert session.received == [(0, 20), (50, 70)]
+    assert session.offset == 20
+    assert session.received_bytes == 40
+
+    session.add_range(15, 50)
+    session.add_range(70, 100)
+    assert session.received == [(0, 100)]
+    assert session.is_complete
+
+
+def test_out_of_order_chunks_assemble_the_file(manager):
+    data = bytes(range(256)) * 40
+    session = manager.create("a.pdf", len(data))
+    put(manager, session.upload_id, data[4096:], 4096, len(data))
+    put(manager, session.upload_id, data[:4096], 0, len(data))
+
+    session = manager.begin_finalize(session.upload_id)
+    assert session.spool_path.read_bytes() == data
+
+
+@pytest.mark.parametrize("case", ["bad_checksum", "short_body", "long_body"])
+def test_rejected_retry_does_not_touch_accepted_range(manager, case):
+    data = b"A" * 1000
+    session = manager.create("a.txt", len(data))
+    put(manager, session.upload_id, data, 0, len(data))
+
+    garbage = b"B" * 1000
+    with pytest.raises(ValueError):
+        if case == "bad_checksum":
+            put(manager, session.upload_id, garbage, 0, len(data), checksum=sha256(data))
+        elif case == "short_body":
+            put(manager, session.upload_id, garbage, 0, len(data), body_data=garbage[:500])
+        else:
+            put(manager, session.upload_id, data, 0, len(data), body_data=garbage + b"B")
+
+    assert session.received == [(0, len(data))]
+    assert manager.begin_finalize(session.upload_id).spool_path.read_bytes() == data
+    assert not list(manager.spool_dir.glob(f"*{uploads.CHUNK_SUFFIX}"))
+
+
+def test_put_after_finalize_started_is_rejected(manager):
+    data = b"A" * 100
+    session = manager.create("a.txt", len(data))
+    put(manager, session.upload_id, data, 0, len(data))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_body():
+            yield b"B" * 50
+            await release.wait()
+            yield b"B" * 50
+
+        task = asyncio.create_task(manager.write_chunk(
+            session.upload_id, f"bytes 0-99/{len(data)}", sha256(b"B" * 100), slow_body()
+        ))
+        await asyncio.sleep(0.05)
+        manager.begin_finalize(session.upload_id)
+        release.set()
+        with pytest.raises(ValueError, match="finalized"):
+            await task
+
+    asyncio.run(scenario())
+    assert session.spool_path.read_bytes() == data
+
+
+def test_finalize_waits_for_chunk_being_copied(manager, monkeypatch):
+    data = b"A" * 100
+    session = manager.create("a.txt", len(data))
+    put(manager, session.upload_id, data, 0, len(data))
+
+    copying = threading.Event()
+    release = threading.Event()
+    copy_chunk = uploads._copy_chunk
+
+    def slow_copy(*args):
+        copying.set()
+        release.wait(5)
+        copy_chunk(*args)
+
+    monkeypatch.setattr(uploads, "_copy_chunk", slow_copy)
+    retry = threading.Thread(target=put, args=(manager, session.upload_id, data[50:], 50, len(data)))
+    retry.start()
+    assert copying.wait(5)
+
+    finished = []
+    finalizer = threading.Thread(target=lambda: finished.append(manager.begin_finalize(session.upload_id)))
+    finalizer.start()
+    time.sleep(0.1)
+    assert not finished
+
+    release.set()
+    retry.join(5)
+    finalizer.join(5)
+    assert finished and session.writers == 0
+    assert session.spool_path.read_bytes() == data
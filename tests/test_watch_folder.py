@@ -0,0 +1,37 @@
+"""Tests for background ingestion of watched files (watch_folder.BackgroundIngestor)."""
+
+import asyncio
+import hashlib
+
+from watch_folder import BackgroundIngestor
+
+
+def test_result_is_discarded_when_the_file_changes_before_extraction(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("old content")
+    stored = []
+
+    async def wait_for_idle():
+        # Overwritten while the ingestor waits for foreground traffic
+        path.write_text("new content")
+
+    ingestor = BackgroundIngestor(
+        extract=lambda file_path, file_extension: {"text": file_path.read_text()},
+        hash_file=lambda file_path: hashlib.sha256(file_path.read_bytes()).hexdigest(),
+        is_known=lambda document_hash, file_extension: False,
+        store=lambda document_hash, file_extension, file_path, result: stored.append((document_hash, result)),
+        wait_for_idle=wait_for_idle
+    )
+
+    async def scenario():
+        ingestor.start()
+        ingestor.submit(path)
+        for _ in range(100):
+            if ingestor.changed or stored:
+                break
+            await asyncio.sleep(0.01)
+        await ingestor.stop()
+
+    asyncio.run(scenario())
+    assert stored == []
+    assert ingestor.stats()["changed"] == 1
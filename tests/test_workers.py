@@ -0,0 +1,39 @@
+"""Tests for worker recycling in the extraction process pool (workers.py)."""
+
+import pytest
+
+from extractor import STUB_MODEL_NAME
+from workers import ProcessPoolExtractor
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessPoolExtractor(2, STUB_MODEL_NAME, max_tasks_per_worker=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_failed_tasks_count_towards_the_task_limit(pool):
+    with pytest.raises(ValueError):
+        pool.extract(b"", "txt")
+    # Idle workers are handed out in FIFO order, so the first task ran on worker 0
+    first = pool._workers[0].pid
+    assert sum(worker.tasks for worker in pool._workers) == 1
+
+    for _ in range(4):
+        assert pool.extract(b"Mail me at x@y.com", "txt")["emails"] == ["x@y.com"]
+
+    pids = {worker.pid for worker in pool._workers}
+    assert first not in pids
+    assert pool.stats()["recycles"]["tasks"] >= 1
+
+
+def test_rss_ceiling_replaces_only_that_worker(pool):
+    pool.extract(b"Mail me at x@y.com", "txt")
+    pool.extract(b"Mail me at x@y.com", "txt")
+    assert all(worker.pid for worker in pool._workers)
+
+    pool.max_worker_rss_mb = 1
+    pool.extract(b"Mail me at x@y.com", "txt")
+    assert pool.stats()["recycles"]["rss"] == 1
+    assert sorted(worker.pid is None for worker in pool._workers) == [False, True]
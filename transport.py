@@ -0,0 +1,302 @@
+"""
+Shared-Memory Transport Module
+
+This module handles:
+- Placing document bytes in shared memory segments, copied from bytes or
+  streamed from an upload's file object block by block
+- Small picklable handles (name + offset + length) passed to worker processes
+- Reference-counted cleanup of segments owned by the API process
+- Reclaiming segments left behind when a worker process crashes
+
+Documents already spooled to disk (resumable uploads) are not copied at all:
+their handle simply names the file. On Linux a shared memory segment is a
+file in /dev/shm too, so workers open segments by path (segment_path) and
+PyMuPDF reads the pages straight from shared memory, without a copy of the
+document in the worker's heap.
+"""
+
+import mmap
+import os
+import threading
+import time
+import uuid
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Union
+
+
+SEGMENT_PREFIX = "docintel"
+
+# Where POSIX shared memory segments appear as files (Linux)
+SHM_DIR = Path("/dev/shm")
+
+# Block size used when streaming a file object into a segment
+COPY_BLOCK_BYTES = 1024 * 1024
+
+
+class SegmentHandle(NamedTuple):
+    """
+    Reference to a byte range held outside the Python heap.
+
+    kind is 'shm' for a multiprocessing.shared_memory segment (name is the
+    segment name) or 'file' for a file on local disk (name is its path).
+    """
+    kind: str
+    name: str
+    offset: int
+    length: int
+
+
+def segment_path(handle: SegmentHandle) -> Optional[Path]:
+    """
+    Path under which the whole document a handle refers to can be opened.
+
+    Args:
+        handle: Handle produced by SegmentRegistry
+
+    Returns:
+        The spooled file, or the segment's file in /dev/shm; None if the
+        handle covers only part of a file or segments are not file-backed
+    """
+    if handle.offset != 0:
+        return None
+    if handle.kind == "file":
+        return Path(handle.name)
+    path = SHM_DIR / handle.name
+    try:
+        if path.stat().st_size == handle.length:
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def open_bytes(handle: SegmentHandle) -> bytes:
+    """
+    Read the bytes a handle refers to (worker side).
+
+    Fallback for handles segment_path() cannot resolve: the data is copied
+    once into the worker's heap and the segment is detached again.
+
+    Args:
+        handle: Handle produced by SegmentRegistry
+
+    Returns:
+        The referenced bytes
+    """
+    if handle.kind == "file":
+        with open(handle.name, 'rb') as f:
+            if handle.length == 0:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[handle.offset:handle.offset + handle.length]
+
+    segment = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return bytes(segment.buf[handle.offset:handle.offset + handle.length])
+    finally:
+        segment.close()
+
+
+class _Segment:
+    """A shared memory segment owned by the API process."""
+
+    __slots__ = ("shm", "refcount", "created_at", "owner")
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: Optional[str]):
+        self.shm = shm
+        self.refcount = 1
+        self.created_at = time.monotonic()
+        self.owner = owner
+
+
+class SegmentRegistry:
+    """
+    Owner of every shared memory segment created for worker IPC.
+
+    Segments start with a reference count of one; each release() drops a
+    reference and the segment is unlinked when none remain. Segments are
+    tagged with the task that owns them so everything belonging to a task
+    can be released together when its worker crashes.
+    """
+
+    def __init__(self, leak_age_seconds: float = 600.0):
+        """
+        Initialize the registry.
+
+        Args:
+            leak_age_seconds: Age after which a still-referenced segment is reported as leaked
+        """
+        self.leak_age_seconds = leak_age_seconds
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.unlinked = 0
+        self.reclaimed = 0
+
+    def _new_name(self) -> str:
+        return f"{SEGMENT_PREFIX}-{os.getpid()}-{uuid.uuid4().hex[:16]}"
+
+    def put_bytes(self, data: Union[bytes, Path], owner: Optional[str] = None) -> SegmentHandle:
+        """
+        Make document content available to worker processes.
+
+        Bytes are copied once into a new shared memory segment. A Path is
+        passed by name without copying anything.
+
+        Args:
+            data: Document content as bytes, or a Path to a file on disk
+            owner: Optional task identifier used by release_owner()
+
+        Returns:
+            Handle to pass to the worker
+        """
+        if isinstance(data, Path):
+            return SegmentHandle("file", str(data), 0, data.stat().st_size)
+
+        segment = shared_memory.SharedMemory(name=self._new_name(), create=True, size=max(1, len(data)))
+        segment.buf[:len(data)] = data
+        with self._lock:
+            self._segments[segment.name] = _Segment(segment, owner)
+            self.created += 1
+        return SegmentHandle("shm", segment.name, 0, len(data))
+
+    def put_stream(self, source: BinaryIO, size: int, owner: Optional[str] = None) -> SegmentHandle:
+        """
+        Copy a file object into a new shared memory segment, block by block.
+
+        Used for uploads, so the document never exists as one bytes object
+        in the API process.
+
+        Args:
+            source: Readable binary file object, positioned at the start
+            size: Number of bytes to copy
+            owner: Optional task identifier used by release_owner()
+
+        Returns:
+            Handle to pass to the worker
+
+        Raises:
+            ValueError: If source holds fewer than size bytes
+        """
+        segment = shared_memory.SharedMemory(name=self._new_name(), create=True, size=max(1, size))
+        try:
+            position = 0
+            while position < size:
+                block = source.read(min(COPY_BLOCK_BYTES, size - position))
+                if not block:
+                    raise ValueError(f"Upload ended after {position} of {size} bytes")
+                segment.buf[position:position + len(block)] = block
+                position += len(block)
+        except BaseException:
+            self._unlink(segment)
+            raise
+        with self._lock:
+            self._segments[segment.name] = _Segment(segment, owner)
+            self.created += 1
+        return SegmentHandle("shm", segment.name, 0, size)
+
+    def acquire(self, handle: SegmentHandle) -> None:
+        """Add a reference to a segment."""
+        if handle.kind != "shm":
+            return
+        with self._lock:
+            self._segments[handle.name].refcount += 1
+
+    def release(self, handle: SegmentHandle) -> None:
+        """
+        Drop a reference to a segment, unlinking it when none remain.
+
+        Args:
+            handle: Handle of the segment
+        """
+        if handle.kind != "shm":
+            return
+        with self._lock:
+            segment = self._segments.get(handle.name)
+            if segment is None:
+                return
+            segment.refcount -= 1
+            if segment.refcount > 0:
+                return
+            del self._segments[handle.name]
+        self._unlink(segment.shm)
+
+    def _unlink(self, shm: shared_memory.SharedMemory) -> None:
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.unlinked += 1
+
+    def release_owner(self, owner: str) -> int:
+        """
+        Unlink every segment belonging to a task, whatever its reference count.
+
+        Called when the task's worker crashed.
+
+        Args:
+            owner: Task identifier
+
+        Returns:
+            Number of segments reclaimed
+        """
+        with self._lock:
+            owned = [name for name, segment in self._segments.items() if segment.owner == owner]
+            segments = [self._segments.pop(name) for name in owned]
+
+        for segment in segments:
+            self._unlink(segment.shm)
+
+        with self._lock:
+            self.reclaimed += len(segments)
+        if segments:
+            print(f"Reclaimed {len(segments)} shared memory segment(s) from failed task {owner}")
+        return len(segments)
+
+    def leaked(self) -> List[str]:
+        """
+        List segments that have been referenced for longer than the leak age.
+
+        Returns:
+            Names of suspected leaked segments
+        """
+        cutoff = time.monotonic() - self.leak_age_seconds
+        with self._lock:
+            return [name for name, segment in self._segments.items() if segment.created_at < cutoff]
+
+    def close_all(self) -> int:
+        """
+        Unlink every remaining segment (used on shutdown).
+
+        Returns:
+            Number of segments that were still alive
+        """
+        with self._lock:
+            segments = list(self._segments.values())
+            self._segments.clear()
+        for segment in segments:
+            self._unlink(segment.shm)
+        if segments:
+            print(f"Warning: {len(segments)} shared memory segment(s) were still in use at shutdown")
+        return len(segments)
+
+    def stats(self) -> Dict:
+        """
+        Return registry statistics.
+
+        Returns:
+            Dictionary with live segment counts and bytes, and cleanup counters
+        """
+        with self._lock:
+            live = list(self._segments.values())
+        return {
+            "live_segments": len(live),
+            "live_bytes": sum(segment.shm.size for segment in live),
+            "created": self.created,
+            "unlinked": self.unlinked,
+            "reclaimed_after_crash": self.reclaimed,
+            "suspected_leaks": len(self.leaked()),
+        }
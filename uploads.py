@@ -0,0 +1,438 @@
+"""
+Resumable Upload Module
+
+This module handles:
+- Upload sessions for large documents sent in byte-range chunks
+- Per-chunk SHA-256 verification and out-of-order chunk assembly
+- Staging each chunk in its own temporary file, and copying it into the
+  upload's spool file only after its length and checksum have been verified
+- Garbage collection of abandoned sessions after a TTL
+
+Protocol:
+    POST   /uploads                  -> create a session (filename, size, optional sha256)
+    PUT    /uploads/{id}             -> send one chunk with Content-Range and X-Chunk-SHA256
+    GET    /uploads/{id}             -> query the contiguous offset and received ranges
+    POST   /uploads/{id}/finalize    -> verify the file and run extraction
+    DELETE /uploads/{id}             -> abort the upload
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+SPOOL_SUFFIX = ".part"
+CHUNK_SUFFIX = ".chunk"
+
+# Request body bytes buffered in memory before they are written to the chunk file
+STAGING_BUFFER_BYTES = 1024 * 1024
+
+
+def _write_all(fd: int, data: bytes, offset: int) -> None:
+    """pwrite() until every byte is written."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _copy_chunk(chunk_path: Path, spool_path: Path, offset: int) -> None:
+    """Copy a verified chunk file into the spool file at offset."""
+    with open(chunk_path, 'rb') as source:
+        fd = os.open(spool_path, os.O_WRONLY)
+        try:
+            while True:
+                data = source.read(STAGING_BUFFER_BYTES)
+                if not data:
+                    break
+                _write_all(fd, data, offset)
+                offset += len(data)
+        finally:
+            os.close(fd)
+
+
+class UploadNotFoundError(LookupError):
+    """Raised when an upload session does not exist or has expired."""
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """
+    Parse a Content-Range header of the form 'bytes start-end/total'.
+
+    Args:
+        header: Raw header value
+
+    Returns:
+        Tuple of (start, end, total) where end is inclusive
+
+    Raises:
+        ValueError: If the header is missing or malformed
+    """
+    if not header:
+        raise ValueError("Content-Range header is required")
+
+    match = CONTENT_RANGE_PATTERN.match(header.strip())
+    if not match:
+        raise ValueError("Content-Range must have the form 'bytes start-end/total'")
+
+    start, end, total = (int(group) for group in match.groups())
+    if start > end:
+        raise ValueError("Content-Range start must not exceed end")
+
+    return start, end, total
+
+
+class UploadSession:
+    """
+    State of a single resumable upload.
+
+    Received bytes are tracked as a sorted list of merged, half-open
+    [start, end) ranges so chunks can arrive in any order or be retried.
+    writers counts verified chunks being copied into the spool file;
+    finalize waits for it to drop to zero before hashing the file.
+    """
+
+    def __init__(self, upload_id: str, filename: str, total_size: int,
+                 spool_path: Path, sha256: Optional[str] = None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.file_extension = filename.split('.')[-1].lower() if '.' in filename else ""
+        self.total_size = total_size
+        self.spool_path = spool_path
+        self.sha256 = sha256.lower() if sha256 else None
+        self.created_at = time.time()
+        self.last_activity = self.created_at
+        self.received: List[Tuple[int, int]] = []
+        self.finalizing = False
+        self.writers = 0
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+
+    def add_range(self, start: int, end: int) -> None:
+        """
+        Record that bytes [start, end) have been written.
+
+        Args:
+            start: First byte offset (inclusive)
+            end: Last byte offset (exclusive)
+        """
+        merged = []
+        for range_start, range_end in sorted(self.received + [(start, end)]):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        self.received = merged
+
+    @property
+    def offset(self) -> int:
+        """Number of contiguous bytes received from the start of the file."""
+        if self.received and self.received[0][0] == 0:
+            return self.received[0][1]
+        return 0
+
+    @property
+    def received_bytes(self) -> int:
+        """Total number of distinct bytes received."""
+        return sum(end - start for start, end in self.received)
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether every byte of the file has been received."""
+        return self.offset == self.total_size
+
+    def to_dict(self, ttl_seconds: float) -> Dict:
+        """
+        Describe the session for API responses.
+
+        Args:
+            ttl_seconds: Idle time after which the session expires
+
+        Returns:
+            Dictionary with the session status
+        """
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.total_size,
+            "offset": self.offset,
+            "received_bytes": self.received_bytes,
+            "received_ranges": [[start, end - 1] for start, end in self.received],
+            "complete": self.is_complete,
+            "expires_at": self.last_activity + ttl_seconds,
+        }
+
+
+class UploadManager:
+    """
+    Registry of resumable upload sessions backed by spool files on disk.
+
+    Sessions live in memory; their data lives in one sparse spool file each,
+    preallocated to the declared size and written with positional writes.
+    Sessions idle for longer than the TTL are removed by sweep_expired().
+    """
+
+    def __init__(self, spool_dir: Optional[str] = None, ttl_seconds: float = 3600,
+                 max_upload_size: int = 8 * 1024 ** 3):
+        """
+        Initialize the upload manager.
+
+        Args:
+            spool_dir: Directory for spool files (defaults to a folder in the system temp dir)
+            ttl_seconds: Idle time after which an unfinished session is discarded
+            max_upload_size: Largest accepted upload in bytes
+        """
+        self.spool_dir = Path(spool_dir or os.path.join(tempfile.gettempdir(), "docintel-uploads"))
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_upload_size = max_upload_size
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self._remove_orphaned_spool_files()
+
+    def _remove_orphaned_spool_files(self) -> None:
+        """Delete spool files left behind by a previous process that have outlived the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for path in [*self.spool_dir.glob(f"*{SPOOL_SUFFIX}"), *self.spool_dir.glob(f"*{CHUNK_SUFFIX}")]:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def create(self, filename: str, total_size: int, sha256: Optional[str] = None) -> UploadSession:
+        """
+        Start a new upload session.
+
+        Args:
+            filename: Original file name (its extension selects the extractor)
+            total_size: Size of the complete file in bytes
+            sha256: Optional SHA-256 hex digest of the complete file, checked on finalize
+
+        Returns:
+            The new UploadSession
+
+        Raises:
+            ValueError: If the size is invalid
+        """
+        if total_size <= 0:
+            raise ValueError("Upload size must be positive")
+        if total_size > self.max_upload_size:
+            raise ValueError(f"Upload size exceeds the limit of {self.max_upload_size} bytes")
+
+        self.sweep_expired()
+
+        upload_id = uuid.uuid4().hex
+        spool_path = self.spool_dir / f"{upload_id}{SPOOL_SUFFIX}"
+        with open(spool_path, 'wb') as f:
+            # Sparse preallocation: chunks are written in place at their offsets
+            f.truncate(total_size)
+
+        session = UploadSession(upload_id, filename, total_size, spool_path, sha256)
+        with self._lock:
+            self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        """
+        Look up an active session.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            The UploadSession
+
+        Raises:
+            UploadNotFoundError: If the session does not exist or has expired
+        """
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is None or self._is_expired(session):
+            raise UploadNotFoundError(f"Upload session not found: {upload_id}")
+        return session
+
+    async def write_chunk(self, upload_id: str, content_range: Optional[str],
+                          checksum: Optional[str], chunks: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Write one byte range of the file from a streamed request body.
+
+        The body is staged in a temporary chunk file as it arrives and hashed
+        on the fly. Only once its length and SHA-256 match is it copied into
+        the spool file and recorded as received, so a corrupted, truncated or
+        over-long retry never touches bytes that were already accepted. Disk
+        writes run in a worker thread.
+
+        Args:
+            upload_id: Session identifier
+            content_range: Content-Range header value ('bytes start-end/total')
+            checksum: Expected SHA-256 hex digest of the chunk
+            chunks: Async iterator over the request body
+
+        Returns:
+            The updated UploadSession
+
+        Raises:
+            UploadNotFoundError: If the session does not exist
+            ValueError: If the range, length or checksum is invalid, or the
+                upload is being finalized
+        """
+        session = self.get(upload_id)
+        start, end, total = parse_content_range(content_range)
+
+        if total != session.total_size:
+            raise ValueError(f"Content-Range total {total} does not match upload size {session.total_size}")
+        if end >= session.total_size:
+            raise ValueError("Content-Range extends past the end of the upload")
+        if not checksum:
+            raise ValueError("X-Chunk-SHA256 header is required")
+        if session.finalizing:
+            raise ValueError("Upload is already being finalized")
+
+        chunk_path = self.spool_dir / f"{upload_id}.{uuid.uuid4().hex}{CHUNK_SUFFIX}"
+        try:
+            await self._stage_chunk(chunk_path, end - start + 1, checksum, chunks)
+
+            with session.lock:
+                if session.finalizing:
+                    raise ValueError("Upload is already being finalized")
+                session.writers += 1
+            try:
+                await asyncio.to_thread(_copy_chunk, chunk_path, session.spool_path, start)
+                with session.lock:
+                    session.add_range(start, end + 1)
+                    session.last_activity = time.time()
+            finally:
+                with session.lock:
+                    session.writers -= 1
+                    session.idle.notify_all()
+        finally:
+            try:
+                chunk_path.unlink()
+            except FileNotFoundError:
+                pass
+        return session
+
+    @staticmethod
+    async def _stage_chunk(chunk_path: Path, expected_length: int, checksum: str,
+                           chunks: AsyncIterator[bytes]) -> None:
+        """
+        Write a request body to its own chunk file and verify it.
+
+        Raises:
+            ValueError: If the body is longer or shorter than expected_length,
+                or its SHA-256 does not match checksum
+        """
+        digest = hashlib.sha256()
+        written = 0
+        buffer = bytearray()
+
+        fd = os.open(chunk_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            async for data in chunks:
+                if not data:
+                    continue
+                if written + len(buffer) + len(data) > expected_length:
+                    raise ValueError("Chunk body is longer than its Content-Range")
+                digest.update(data)
+                buffer += data
+                if len(buffer) >= STAGING_BUFFER_BYTES:
+                    await asyncio.to_thread(_write_all, fd, bytes(buffer), written)
+                    written += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(_write_all, fd, bytes(buffer), written)
+                written += len(buffer)
+        finally:
+            os.close(fd)
+
+        if written != expected_length:
+            raise ValueError(f"Chunk body has {written} bytes, Content-Range expects {expected_length}")
+        if digest.hexdigest() != checksum.strip().lower():
+            raise ValueError("Chunk checksum mismatch")
+
+    def begin_finalize(self, upload_id: str) -> UploadSession:
+        """
+        Mark a complete upload as finalizing so no further chunks are accepted.
+
+        Blocks until chunks that were already being copied into the spool
+        file have been written, so the file is stable once this returns.
+
+        Args:
+            upload_id: Session identifier
+
+        Returns:
+            The UploadSession
+
+        Raises:
+            UploadNotFoundError: If the session does not exist
+            ValueError: If bytes are still missing or finalize is already running
+        """
+        session = self.get(upload_id)
+        with session.lock:
+            if not session.is_complete:
+                raise ValueError(
+                    f"Upload is incomplete: {session.received_bytes} of {session.total_size} bytes received"
+                )
+            if session.finalizing:
+                raise ValueError("Upload is already being finalized")
+            session.finalizing = True
+            session.idle.wait_for(lambda: session.writers == 0)
+            session.last_activity = time.time()
+        return session
+
+    def discard(self, upload_id: str) -> None:
+        """
+        Remove a session and delete its spool file.
+
+        Args:
+            upload_id: Session identifier
+        """
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is not None:
+            try:
+                session.spool_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _is_expired(self, session: UploadSession) -> bool:
+        """Whether a session has been idle for longer than the TTL."""
+        return not session.finalizing and time.time() - session.last_activity > self.ttl_seconds
+
+    def sweep_expired(self) -> int:
+        """
+        Discard every session that has been idle for longer than the TTL.
+
+        Returns:
+            Number of sessions removed
+        """
+        with self._lock:
+            expired = [upload_id for upload_id, session in self._sessions.items()
+                       if self._is_expired(session)]
+        for upload_id in expired:
+            self.discard(upload_id)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        """
+        Return upload statistics.
+
+        Returns:
+            Dictionary with the number of active sessions and spooled bytes
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "active_sessions": len(sessions),
+            "spooled_bytes": sum(session.received_bytes for session in sessions),
+        }
@@ -0,0 +1,417 @@
+"""
+Watch Folder Module
+
+This module handles:
+- Watching directories for new or changed PDF/TXT files (inotify via ctypes,
+  with a polling fallback for other platforms and network filesystems)
+- Debouncing files that are still being written
+- Pre-extracting settled files in the background, at low priority, so that
+  a later /extract call for the same document is a cache hit
+
+A file is considered settled once its size and modification time have not
+changed for settle_seconds. Hidden files and typical partial-download names
+(*.part, *.tmp, *.crdownload, *~) are ignored.
+
+Background extraction yields to user traffic twice over: a job is only
+started while the foreground scheduler has nothing queued, and the
+background worker processes run at the lowest CPU priority (nice 19).
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+
+WATCHED_EXTENSIONS = ("pdf", "txt")
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download", "~")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+# (size, mtime_ns) of a file
+Signature = Tuple[int, int]
+
+
+def is_candidate(path: Path) -> bool:
+    """Whether a path looks like a finished document worth extracting."""
+    name = path.name
+    if name.startswith(".") or name.endswith(PARTIAL_SUFFIXES):
+        return False
+    return name.rsplit(".", 1)[-1].lower() in WATCHED_EXTENSIONS if "." in name else False
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    """Size and modification time of a regular file, or None if it is gone."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _Inotify:
+    """Minimal inotify binding (Linux only)."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths: Dict[int, Path] = {}
+
+    def add_watch(self, directory: Path) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_add_watch failed for {directory}: {os.strerror(error)}")
+        self.paths[wd] = directory
+
+    def read_events(self, timeout: float) -> List[Tuple[Optional[Path], int]]:
+        """Wait up to timeout seconds and return (path, mask) events."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            path = directory / os.fsdecode(name) if directory is not None and name else None
+            events.append((path, mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Watches directories (recursively) and reports files once they have settled.
+
+    Runs in its own daemon thread. on_ready is called from that thread with
+    the path of each settled file; a file is reported again only after it
+    changes.
+    """
+
+    def __init__(self, directories: List[str], on_ready: Callable[[Path], None],
+                 settle_seconds: float = 2.0, poll_interval: float = 5.0, backend: str = "auto"):
+        """
+        Initialize the watcher (call start() to begin watching).
+
+        Args:
+            directories: Directories to watch, including their subdirectories
+            on_ready: Called with the path of each settled file
+            settle_seconds: How long a file must stay unchanged before it is reported
+            poll_interval: Seconds between directory scans in polling mode
+            backend: 'inotify', 'poll' or 'auto' (inotify when available)
+        """
+        self.directories = [Path(directory).resolve() for directory in directories]
+        self.on_ready = on_ready
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.requested_backend = backend
+        self.backend: Optional[str] = None
+        # path -> (time of last change, signature at that time)
+        self._pending: Dict[Path, Tuple[float, Signature]] = {}
+        # path -> signature when last reported
+        self._reported: Dict[Path, Signature] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self.reported = 0
+        self.rescans = 0
+
+    def start(self) -> None:
+        """Start watching."""
+        if self._thread is not None:
+            return
+        for directory in self.directories:
+            if not directory.is_dir():
+                raise ValueError(f"Watch directory does not exist: {directory}")
+
+        self.backend = "poll"
+        if self.requested_backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+                for directory in self.directories:
+                    self._watch_tree(directory)
+                self.backend = "inotify"
+            except OSError as e:
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                if self.requested_backend == "inotify":
+                    raise
+                print(f"Warning: inotify unavailable ({str(e)}), falling back to polling")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+        print(f"Watching {len(self.directories)} director(ies) for documents ({self.backend})")
+
+    def stop(self) -> None:
+        """Stop watching."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _watch_tree(self, directory: Path) -> None:
+        self._inotify.add_watch(directory)
+        for root, subdirectories, _ in os.walk(directory):
+            for name in subdirectories:
+                if not name.startswith("."):
+                    self._inotify.add_watch(Path(root) / name)
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+
+    def _run(self) -> None:
+        # Files already present count as changes, so they are pre-extracted too
+        self._scan()
+        next_scan = time.monotonic() + self.poll_interval
+        tick = max(0.05, min(self.settle_seconds / 4, 1.0))
+
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                for path, mask in self._inotify.read_events(tick):
+                    self._handle_event(path, mask)
+            else:
+                self._stop.wait(tick)
+                if time.monotonic() >= next_scan:
+                    self._scan()
+                    next_scan = time.monotonic() + self.poll_interval
+            self._settle()
+
+    def _handle_event(self, path: Optional[Path], mask: int) -> None:
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped by the kernel: fall back to a full scan
+            self.rescans += 1
+            self._scan()
+            return
+        if path is None:
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and not path.name.startswith("."):
+                try:
+                    self._watch_tree(path)
+                except OSError as e:
+                    print(f"Warning: cannot watch {path}: {str(e)}")
+                self._scan(path)
+            return
+        self._touch(path)
+
+    def _touch(self, path: Path) -> None:
+        """Note that a file changed; it is reported once it stays unchanged."""
+        if not is_candidate(path):
+            return
+        signature = file_signature(path)
+        if signature is None or self._reported.get(path) == signature:
+            return
+        pending = self._pending.get(path)
+        if pending is None or pending[1] != signature:
+            self._pending[path] = (time.monotonic(), signature)
+
+    def _scan(self, root: Optional[Path] = None) -> None:
+        for directory in [root] if root is not None else self.directories:
+            for current, subdirectories, files in os.walk(directory):
+                subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+                for name in files:
+                    self._touch(Path(current) / name)
+
+    def _settle(self) -> None:
+        """Report pending files whose size and mtime have been stable long enough."""
+        now = time.monotonic()
+        for path, (changed_at, signature) in list(self._pending.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+            current = file_signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != signature:
+                # Still being written
+                self._pending[path] = (now, current)
+            else:
+                del self._pending[path]
+                self._reported[path] = current
+                self.reported += 1
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    print(f"Warning: failed to queue {path}: {str(e)}")
+
+    def stats(self) -> Dict:
+        """
+        Return watcher statistics.
+
+        Returns:
+            Dictionary with the backend in use and file counters
+        """
+        return {
+            "backend": self.backend,
+            "directories": [str(directory) for directory in self.directories],
+            "settling": len(self._pending),
+            "reported": self.reported,
+            "rescans": self.rescans,
+        }
+
+
+class BackgroundIngestor:
+    """
+    Pre-extracts settled files in the background.
+
+    Files are queued from the watcher thread and processed one at a time on
+    the event loop: each job waits until the foreground scheduler is idle,
+    skips documents whose current result is already known, and otherwise
+    extracts through a dedicated low-priority worker pool. A file rewritten
+    between hashing and extraction is hashed again afterwards and its result
+    discarded (the watcher reports the new content separately).
+    """
+
+    def __init__(self, extract: Callable[[Path, str], Dict], hash_file: Callable[[Path], str],
+                 is_known: Callable[[str, str], bool], store: Callable[[str, str, Path, Dict], None],
+                 wait_for_idle: Callable[[], Awaitable[None]], max_queued: int = 10000):
+        """
+        Initialize the ingestor (call start() from the event loop).
+
+        Args:
+            extract: Blocking function extracting (path, file_extension)
+            hash_file: Blocking function returning a file's SHA-256 hex digest
+            is_known: Blocking function telling whether a current result exists
+                for (document_hash, file_extension)
+            store: Saves (document_hash, file_extension, path, result)
+            wait_for_idle: Coroutine that returns once foreground traffic leaves room
+            max_queued: Files kept waiting at most; further files are dropped
+        """
+        self._extract = extract
+        self._hash_file = hash_file
+        self._is_known = is_known
+        self._store = store
+        self._wait_for_idle = wait_for_idle
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[Path] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.extracted = 0
+        self.already_known = 0
+        self.changed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.yield_seconds = 0.0
+
+    def start(self) -> None:
+        """Start processing queued files on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop processing; queued files are abandoned."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, path: Path) -> None:
+        """Queue a file for extraction (safe to call from any thread)."""
+        self._loop.call_soon_threadsafe(self._enqueue, path)
+
+    def _enqueue(self, path: Path) -> None:
+        if path in self._queued:
+            return
+        if len(self._queued) >= self.max_queued:
+            self.dropped += 1
+            return
+        self._queued.add(path)
+        self._queue.put_nowait(path)
+
+    async def _run(self) -> None:
+        while True:
+            path = await self._queue.get()
+            self._queued.discard(path)
+            file_extension = path.suffix.lower().lstrip('.')
+            try:
+                document_hash = await run_in_threadpool(self._hash_file, path)
+                if await run_in_threadpool(self._is_known, document_hash, file_extension):
+                    self.already_known += 1
+                    continue
+
+                waited = time.monotonic()
+                await self._wait_for_idle()
+                self.yield_seconds += time.monotonic() - waited
+
+                result = await run_in_threadpool(self._extract, path, file_extension)
+                # The file is read again by path, possibly long after it was hashed:
+                # only store the result if it still describes the hashed content
+                if await run_in_threadpool(self._hash_file, path) != document_hash:
+                    self.changed += 1
+                    continue
+                self._store(document_hash, file_extension, path, result)
+                self.extracted += 1
+            except asyncio.CancelledError:
+                raise
+            except FileNotFoundError:
+                # Removed or renamed before it was processed
+                continue
+            except Exception as e:
+                self.failed += 1
+                print(f"Warning: background extraction of {path} failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        """
+        Return ingestion statistics.
+
+        Returns:
+            Dictionary with queue depth, outcome counters and time spent yielding
+        """
+        return {
+            "queued": len(self._queued),
+            "extracted": self.extracted,
+            "already_known": self.already_known,
+            "changed": self.changed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "yield_seconds": round(self.yield_seconds, 3),
+        }
@@ -0,0 +1,270 @@
+"""
+Extraction Worker Pool Module
+
+This module handles:
+- Running DocumentExtractor.extract in a pool of worker processes
+- Passing documents to workers through shared memory handles
+- Recovering from worker crashes without leaking shared memory
+- Recycling workers after a number of tasks or above a memory ceiling
+
+Each worker process loads its own copy of the NER model once, in the pool
+initializer. Workers receive a SegmentHandle (a few dozen bytes) instead of
+the pickled document, open it by path where possible (spooled files and,
+on Linux, shared memory segments) and send back only the structured result.
+
+Each worker is a single-process executor that runs one task at a time, so
+one worker can be replaced without disturbing the others. Long-running
+workers slowly grow (allocator fragmentation, MuPDF and tokenizer caches):
+the executor restarts its process after max_tasks_per_worker tasks
+(max_tasks_per_child), and a worker whose task, successful or not, reports
+an RSS above the ceiling is replaced once that task has finished.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from extraction_budget import ExtractionBudget
+from transport import SegmentHandle, SegmentRegistry, open_bytes, segment_path
+
+
+# Per-process extractor, created by _init_worker
+_worker_extractor = None
+
+
+def _init_worker(model_name: str, nice: int = 0) -> None:
+    """Load the extractor once per worker process."""
+    global _worker_extractor
+    if nice:
+        os.nice(nice)
+    from extractor import DocumentExtractor
+    _worker_extractor = DocumentExtractor(model_name=model_name)
+
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _extract_in_worker(handle: SegmentHandle, file_extension: str, fields: Optional[List[str]],
+                       include_positions: bool, budget: Optional[ExtractionBudget] = None
+                       ) -> Tuple[Optional[Dict], Tuple[int, int], Optional[Exception]]:
+    """
+    Worker entry point: extract a document referenced by a handle.
+
+    Failures are returned rather than raised, so failed tasks still report
+    the worker's memory usage.
+
+    Args:
+        handle: Handle to the document content
+        file_extension: File extension (e.g., 'pdf', 'txt')
+        fields: Optional list of output fields
+        include_positions: Whether to add value positions to the result
+        budget: Optional page/time budget (its clock starts in the worker)
+
+    Returns:
+        Tuple of (structured result or None, (worker pid, worker RSS in bytes),
+        exception raised by the extraction or None)
+    """
+    result = error = None
+    try:
+        # Open by path where possible, so the document is not copied into this process
+        file_content = segment_path(handle) or open_bytes(handle)
+
+        _worker_extractor.resolve_fields(fields)
+        view = _worker_extractor.extract_document_view(file_content, file_extension, budget)
+        del file_content
+        result = _worker_extractor.extract_from_text(view, fields, include_positions)
+        if budget is not None:
+            result["coverage"] = budget.coverage()
+        del view
+    except Exception as e:
+        error = e
+    return result, (os.getpid(), _current_rss()), error
+
+
+class _Worker:
+    """One worker process, wrapped in its own single-process executor."""
+
+    def __init__(self, executor: ProcessPoolExecutor):
+        self.executor = executor
+        # Pid and RSS reported by the last task, and tasks run since that pid started
+        self.pid: Optional[int] = None
+        self.rss = 0
+        self.tasks = 0
+
+
+class ProcessPoolExtractor:
+    """
+    Drop-in replacement for DocumentExtractor.extract backed by worker processes.
+
+    The methods block until the worker finishes, so they are meant to be
+    called from the scheduler's thread pool, like DocumentExtractor.extract.
+    """
+
+    def __init__(self, processes: int, model_name: str, registry: Optional[SegmentRegistry] = None,
+                 max_tasks_per_worker: int = 0, max_worker_rss_mb: float = 0, nice: int = 0):
+        """
+        Start the worker pool.
+
+        Args:
+            processes: Number of worker processes
+            model_name: NER model each worker loads
+            registry: Shared memory registry (a new one is created by default)
+            max_tasks_per_worker: Replace a worker after it has run this many tasks (0 = never)
+            max_worker_rss_mb: Replace a worker once its RSS exceeds this many MB (0 = never)
+            nice: Niceness increment of the worker processes (19 = lowest CPU priority)
+        """
+        self.processes = processes
+        self.model_name = model_name
+        self.registry = registry or SegmentRegistry()
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self.nice = nice
+        self.crashes = 0
+        self.recycles: Dict[str, int] = {"tasks": 0, "rss": 0}
+        self.peak_worker_rss_mb = 0.0
+        self._lock = threading.Lock()
+        self._workers = [_Worker(self._new_executor()) for _ in range(processes)]
+        # Workers not running a task; a task holds its worker until it finishes
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn rather than fork: forking a process that already runs torch
+        # threads can deadlock the child (and max_tasks_per_child requires it)
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.nice),
+            max_tasks_per_child=self.max_tasks_per_worker or None
+        )
+
+    def _run(self, file_content: Union[bytes, Path], file_extension: str,
+             fields: Optional[List[str]], include_positions: bool,
+             budget: Optional[ExtractionBudget] = None) -> Dict:
+        task_id = uuid.uuid4().hex
+        handle = self.registry.put_bytes(file_content, owner=task_id)
+
+        worker = self._idle.get()
+        try:
+            future = worker.executor.submit(
+                _extract_in_worker, handle, file_extension, fields, include_positions, budget
+            )
+            result, usage, error = future.result()
+            self._record_usage(worker, *usage)
+        except BrokenProcessPool:
+            self._handle_crash(worker, task_id)
+            raise RuntimeError("Extraction worker process crashed")
+        finally:
+            self.registry.release(handle)
+            self._idle.put(worker)
+
+        if error is not None:
+            raise error
+        return result
+
+    def _replace_executor(self, worker: _Worker, cancel_futures: bool = False) -> None:
+        """Give worker a fresh process (worker must be held by the caller's task)."""
+        executor = worker.executor
+        with self._lock:
+            worker.executor = self._new_executor()
+            worker.pid = None
+            worker.rss = 0
+            worker.tasks = 0
+        # The old executor has no other task, so its process exits right away
+        executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+    def _record_usage(self, worker: _Worker, pid: int, rss: int) -> None:
+        """Account a finished task (successful or not) and replace the worker if its RSS is too high."""
+        rss_mb = rss / (1024 * 1024)
+        with self._lock:
+            self.peak_worker_rss_mb = max(self.peak_worker_rss_mb, rss_mb)
+            if worker.pid is not None and worker.pid != pid:
+                # The executor retired the previous process after max_tasks_per_child tasks
+                self.recycles["tasks"] += 1
+                worker.tasks = 0
+            worker.pid = pid
+            worker.rss = rss
+            worker.tasks += 1
+            if not (self.max_worker_rss_mb and rss_mb > self.max_worker_rss_mb):
+                return
+            self.recycles["rss"] += 1
+
+        print(f"Recycling extraction worker {pid} (RSS {rss_mb:.0f} MB > {self.max_worker_rss_mb:g} MB)")
+        self._replace_executor(worker)
+
+    def _handle_crash(self, worker: _Worker, task_id: str) -> None:
+        """Reclaim the task's segments and replace the crashed worker."""
+        self.registry.release_owner(task_id)
+        with self._lock:
+            self.crashes += 1
+        print("Warning: extraction worker crashed, restarting it")
+        self._replace_executor(worker, cancel_futures=True)
+
+    def extract(self, file_content: Union[bytes, Path], file_extension: str,
+                fields: Optional[List[str]] = None, include_positions: bool = False,
+                budget: Optional[ExtractionBudget] = None) -> Dict:
+        """
+        Extract a document in a worker process.
+
+        Passing a Path (a spooled upload, or a segment from put_stream() via
+        transport.segment_path) avoids copying the document at all.
+
+        Args:
+            file_content: File content as bytes, or a Path to the file on disk
+            file_extension: File extension (e.g., 'pdf', 'txt')
+            fields: Optional list of output fields to extract
+            include_positions: Whether to add value positions to the result
+            budget: Optional page/time budget (see DocumentExtractor.extract)
+
+        Returns:
+            Dictionary with structured entity extraction results
+
+        Raises:
+            ValueError: If file processing fails
+            RuntimeError: If the worker process crashed
+        """
+        return self._run(file_content, file_extension, fields, include_positions, budget)
+
+    def shutdown(self) -> None:
+        """Stop the workers and unlink any remaining shared memory."""
+        with self._lock:
+            executors = [worker.executor for worker in self._workers]
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.registry.close_all()
+
+    def stats(self) -> Dict:
+        """
+        Return worker pool statistics.
+
+        Returns:
+            Dictionary with the pool size, crash and recycle counts, worker
+            memory and shared memory usage
+        """
+        with self._lock:
+            worker_rss = [worker.rss for worker in self._workers]
+            recycles = dict(self.recycles)
+        return {
+            "processes": self.processes,
+            "crashes": self.crashes,
+            "recycles": recycles,
+            "max_tasks_per_worker": self.max_tasks_per_worker,
+            "max_worker_rss_mb": self.max_worker_rss_mb,
+            "worker_rss_mb": round(max(worker_rss, default=0) / (1024 * 1024), 1),
+            "peak_worker_rss_mb": round(self.peak_worker_rss_mb, 1),
+            "shared_memory": self.registry.stats(),
+        }